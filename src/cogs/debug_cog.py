@@ -34,6 +34,8 @@ from data.constants import (
     DB_PATH
 )
 
+from tools.api_client import RequestPriority
+from tools.http_metrics import METRICS_WINDOW_S
 from tools.log_builder import (
     LogBuilder,
     LogColor,
@@ -114,6 +116,31 @@ class DebugCog(commands.Cog, name=CogsNames.DEBUG):
         except Exception:
             pass
 
+        limiter = self.bot.playfab_manager.rate_limiter
+        embed.add_field(inline=False, name="PlayFab rate limiter", value='\n'.join(
+            f"{priority.name.capitalize()}: {limiter.queue_depth(priority)} queued | {limiter.acquired[priority]} served "
+            f"(wait avg. {round(limiter.average_wait_s(priority) * 1000)}ms, max. {round(limiter.max_wait_s[priority] * 1000)}ms)"
+            for priority in RequestPriority
+        ))
+
+        upstream_lines = [
+            f"**{family}**: {stats.requests} req | p50 {stats.p50_ms:.0f} / p95 {stats.p95_ms:.0f} / p99 {stats.p99_ms:.0f}ms | "
+            f"{' '.join(f"`{status}`×{count}" for status, count in sorted(stats.status_codes.items(), key=str))} | "
+            f"{stats.bytes_received / 1024:.1f}KB | reuse {f"{stats.reuse_ratio:.0%}" if stats.reuse_ratio is not None else '-'} | "
+            f"{stats.timeouts} {plurial("timeout", stats.timeouts)}" +
+            (f" | {stats.rejected_bodies} too large" if stats.rejected_bodies else '') +
+            (f" | {stats.truncated_bodies} truncated" if stats.truncated_bodies else '')
+            for family, stats in self.bot.http_client.metrics.stats().items()
+        ]
+        # an embed field is limited to 1024 characters
+        field_value, field_index = '', 1
+        for line in upstream_lines or ["*No request in the window*"]:
+            if len(field_value) + len(line) + 1 > 1024:
+                embed.add_field(inline=False, name=f"Upstream HTTP requests (last {METRICS_WINDOW_S // 60}mn) #{field_index}", value=field_value)
+                field_value, field_index = '', field_index + 1
+            field_value += f"{line}\n"
+        embed.add_field(inline=False, name=f"Upstream HTTP requests (last {METRICS_WINDOW_S // 60}mn){f" #{field_index}" if field_index > 1 else ''}", value=field_value)
+
         current_commit = await get_commit()
 
         embed.add_field(inline=False, name="System software specifications", value=(
@@ -13,9 +13,16 @@ import math
 from data.cogs import CogsNames
 from tools.utils import plurial
 from tools.typing import GamePlaylist
+from tools.api_client import (
+    PublicAPI,
+    Deadline,
+    UpstreamUnavailable
+)
+
 from tools.stats_parser import (
     fetch_regions_list,
-    fetch_games_list
+    fetch_games_list,
+    games_list_key
 )
 
 from data.constants import (
@@ -52,14 +59,32 @@ class GameBrowserView(discord.ui.LayoutView):
         self.remove_item(self.region_select_row)
         self.remove_item(self.playlist_select_row)
         self.container.clear_items()
+
+        try:
+            games_by_playlist = await fetch_games_list(self.bot.http_client, self._selected_region, Deadline.from_interaction(interaction))
+            unavailable = None
+        except UpstreamUnavailable as error:
+            games_by_playlist, unavailable = None, error
+
+        stale_since = self.bot.upstream_storage.stale_since(games_list_key(self._selected_region))
         self.container.add_item(discord.ui.TextDisplay(content=(
             f"## 🌐 Game currently in progress\n"
-            f"➜ region **{self._selected_region.upper()}** | playlist **{self._selected_playlist.label}**\n"
-            f"-# **List updated at {discord.utils.format_dt(discord.utils.utcnow(), 'S')}**"
+            f"➜ region **{self._selected_region.upper()}** | playlist **{self._selected_playlist.label}**\n" +
+            (
+                f"-# {DefaultEmojis.WARN} **The servers are not responding, this list dates from {discord.utils.format_dt(stale_since, 'R')}**"
+                if stale_since and not unavailable else
+                f"-# **List updated at {discord.utils.format_dt(discord.utils.utcnow(), 'S')}**"
+            )
         )))
 
-        games_by_playlist = await fetch_games_list(self._selected_region)
-        if not games_by_playlist:
+        if unavailable:
+            # the host is known to be down (or too slow): no need to log it on every click
+            self.container.add_item(discord.ui.TextDisplay(content=(
+                f"📡 *The **{self._selected_region.upper()}** servers are not responding at the moment...*\n"
+                f"Try again {f"in {math.ceil(unavailable.retry_after)} seconds" if unavailable.retry_after else "in a moment"} or choose another region?"
+            )))
+            self.container.add_item(discord.ui.Separator())
+        elif not games_by_playlist:
             self.container.add_item(discord.ui.TextDisplay(content=f"*Oops! No ongoing games were found?*{ASK_HELP}"))
             self.container.add_item(discord.ui.Separator())
             await log(
@@ -171,9 +196,11 @@ class GameBrowserCog(commands.Cog, name=CogsNames.GAME_BROWSER):
         container = discord.ui.Container(accent_color=discord.Color.dark_blue())
         view = discord.ui.LayoutView()
         view.add_item(container)
-        container.add_item(discord.ui.TextDisplay(content="### 🧭 Select a region to search"))
-
-        regions_list = await fetch_regions_list()
+        regions_list = await fetch_regions_list(self.bot.http_client, Deadline.from_interaction(interaction))
+        container.add_item(discord.ui.TextDisplay(content="### 🧭 Select a region to search" + (
+            f"\n-# {DefaultEmojis.WARN} *The game services are not responding, these regions may be outdated*"
+            if self.bot.upstream_storage.stale_since(PublicAPI.REGIONS) else ''
+        )))
 
         if not regions_list:
             container.add_item(discord.ui.TextDisplay(content="*Hmm... No regions seem to be available... Please try again later?*"))
@@ -7,9 +7,15 @@ This cog contain statistical commands
 
 import discord
 from discord.ext import commands
+import asyncio
 from discord import app_commands
-from datetime import datetime
+from datetime import (
+    datetime,
+    timedelta,
+    timezone
+)
 from enum import Enum
+from io import BytesIO
 # bot files
 from data.cogs import CogsNames
 from data.constants import (
@@ -19,17 +25,23 @@ from data.constants import (
     FOOTER_EMBED
 )
 
-from tools.api_client import PublicAPI
+from tools.api_client import Deadline
+from tools.game_status import (
+    GameStatusSnapshot,
+    GAME_STATUS_FETCH_DEADLINE_S,
+    GAME_STATUS_FIRST_RENDER_S
+)
 from tools.typing import (
     GamePlaylist,
-    GameRegion
+    GameRegion,
+    regions_status
 )
 
 from tools.stats_parser import (
-    fetch_build_date,
-    fetch_server_stats,
-    fetch_game_version,
     fetch_player,
+    load_mod_history,
+    load_color_theme,
+    weapon_label,
     PlayerProfile
 )
 
@@ -46,8 +58,9 @@ class PlayerInfoState(Enum):
 class PlayerInfoView(discord.ui.LayoutView):
     menu_row = discord.ui.ActionRow()
 
-    def __init__(self, requested_name: str, player: PlayerProfile | None, author: discord.User | discord.Member):
+    def __init__(self, bot: commands.Bot, requested_name: str, player: PlayerProfile | None, author: discord.User | discord.Member):
         super().__init__()
+        self.bot = bot
         self.container = discord.ui.Container(accent_color=discord.Color.dark_blue())
         self.add_item(self.container)
         self.current_view: PlayerInfoState = PlayerInfoState.STATS
@@ -55,7 +68,7 @@ class PlayerInfoView(discord.ui.LayoutView):
         self.request_author = author
         self.requested_name = requested_name
         self.player = player
-        self.attachment = discord.File(self.player.color_theme[0], self.player.color_theme[1]) if self.player and self.player.color_theme else None
+        self._theme_attached = False
 
     async def generate_interface(self):
         self.remove_item(self.menu_row)
@@ -67,26 +80,18 @@ class PlayerInfoView(discord.ui.LayoutView):
             )))
             return self
 
-        stats = discord.ui.TextDisplay(content=(
+        self.container.add_item(discord.ui.TextDisplay(content=(
             f"## `{f"[{self.player.clan}] " if self.player.clan else ''}{self.player.name}` (level {self.player.level})\n"
             f"🏅 {self.player.xp_progress()}\n"
             f"💀 **{self.player.kills}** kills | **{self.player.deaths}** deaths | **{self.player.kd_ratio or '-'} K/D**\n"
             f"⚔️ In **{self.player.matches}** matches, **{self.player.wins}** wins (*{self.player.win_ratio} win rate*)\n" +
             f"-# Account created on {discord.utils.format_dt(self.player.created)}"
-        ))
-        if self.player.color_theme:
-            self.container.add_item(discord.ui.Section(stats, accessory=discord.ui.Thumbnail(
-                    media=f"attachment://{self.player.color_theme[1]}",
-                    description=f"Primary: {self.player.primary_color} | Secondary: {self.player.secondary_color}"
-                )
-            ))
-        else:
-            self.container.add_item(stats)
-        if self.player.is_admin or self.player.mod_history:
+        )))
+        if self.player.is_admin or self.player.mod_notes:
             self.container.add_item(discord.ui.Separator())
             self.container.add_item(discord.ui.TextDisplay(content=(
                 (f"> 🛡️ **`{self.player.name}` is an in-game administrator!**\n" if self.player.is_admin else '') +
-                ("> 🚩 This player has already been flagged by moderation" if self.player.mod_history else '')
+                ("> 🚩 This player has already been flagged by moderation" if self.player.mod_notes else '')
             )))
 
         advanced_stats = (
@@ -118,11 +123,20 @@ class PlayerInfoView(discord.ui.LayoutView):
                 )))
         elif self.current_view == PlayerInfoState.LOADOUT:
             self.loadout_view_button.disabled = True
-            if self.player.best_weapons or self.player.avatar_mods:
-                self.container.add_item(discord.ui.TextDisplay(content=(
-                    (f"## Top 5 weapons\n{self.player.best_weapons}\n" if self.player.best_weapons else '') +
-                    (f"## Current avatar mods\n{self.player.avatar_mods}" if self.player.avatar_mods else '')
-                )))
+            loadout = (
+                (f"## Top 5 weapons\n{self.player.best_weapons}\n" if self.player.best_weapons else '') +
+                (f"## Current avatar mods\n{self.player.avatar_mods}" if self.player.avatar_mods else '')
+            )
+            if self.player.color_theme:
+                self.container.add_item(discord.ui.Section(
+                    discord.ui.TextDisplay(content=loadout or "## Avatar colors"),
+                    accessory=discord.ui.Thumbnail(
+                        media=f"attachment://{self.player.color_theme[1]}",
+                        description=f"Primary: {self.player.primary_color} | Secondary: {self.player.secondary_color}"
+                    )
+                ))
+            elif loadout:
+                self.container.add_item(discord.ui.TextDisplay(content=loadout))
         elif self.current_view == PlayerInfoState.MODINFO:
             self.mod_view_button.disabled = True
             if self.player.mod_history:
@@ -134,9 +148,9 @@ class PlayerInfoView(discord.ui.LayoutView):
         self.menu_row.clear_items()
         if advanced_stats or achievements:
             self.menu_row.add_item(self.stats_view_button)
-        if self.player.best_weapons or self.player.avatar_mods:
+        if self.player.best_weapons or self.player.has_loadout:
             self.menu_row.add_item(self.loadout_view_button)
-        if self.request_author.guild_permissions.administrator and self.player.mod_history:
+        if self.request_author.guild_permissions.administrator and self.player.mod_notes:
             self.menu_row.add_item(self.mod_view_button)
 
         if len(self.menu_row.children) >= 1:
@@ -158,8 +172,15 @@ class PlayerInfoView(discord.ui.LayoutView):
         self.current_view = PlayerInfoState.LOADOUT
         self.stats_view_button.disabled = False
         self.mod_view_button.disabled = False
+        # the color theme is only rendered (and attached) the first time this tab is opened
+        await interaction.response.defer()
+        theme = await load_color_theme(self.player)
         await self.generate_interface()
-        await interaction.response.edit_message(view=self)
+        if theme and not self._theme_attached:
+            self._theme_attached = True
+            await interaction.edit_original_response(view=self, attachments=[discord.File(BytesIO(theme[0]), theme[1])])
+        else:
+            await interaction.edit_original_response(view=self)
 
     @menu_row.button(label="Moderation history", emoji='🛡️', style=discord.ButtonStyle.danger)
     async def mod_view_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -170,27 +191,77 @@ class PlayerInfoView(discord.ui.LayoutView):
         self.current_view = PlayerInfoState.MODINFO
         self.stats_view_button.disabled = False
         self.loadout_view_button.disabled = False
+        # the moderators are only looked up the first time this tab is opened
+        await interaction.response.defer()
+        await load_mod_history(self.bot.playfab_manager, self.player)
         await self.generate_interface()
-        await interaction.response.edit_message(view=self)
+        await interaction.edit_original_response(view=self)
+
+# ---------------------------------- player compare
+MAX_COMPARED_PLAYERS = 8
+
+class PlayerCompareView(discord.ui.LayoutView):
+    def __init__(self, players: list[PlayerProfile], not_found: list[str], ignored: list[str] | None = None):
+        super().__init__()
+        self.container = discord.ui.Container(accent_color=discord.Color.dark_blue())
+        self.add_item(self.container)
+        self.players = players
+        self.not_found = not_found
+        self.ignored = ignored or [] # names given beyond MAX_COMPARED_PLAYERS
+
+    async def generate_interface(self):
+        self.container.clear_items()
+        self.container.add_item(discord.ui.TextDisplay(content=f"## ⚖️ Comparison of {len(self.players)} players"))
+
+        best_kd = max((player.kd_ratio for player in self.players), default=0)
+        best_win_rate = max((player.wins / max(1, player.matches) for player in self.players), default=0)
+        best_level = max((player.level for player in self.players), default=0)
+        def medal(is_best: bool) -> str:
+            return " 🥇" if is_best and len(self.players) > 1 else ''
+
+        for player in sorted(self.players, key=lambda player: player.kd_ratio, reverse=True):
+            top_weapons = sorted(player.kill_stats.items(), key=lambda item: item[1], reverse=True)[:3]
+            self.container.add_item(discord.ui.Separator())
+            self.container.add_item(discord.ui.TextDisplay(content=(
+                f"### `{f"[{player.clan}] " if player.clan else ''}{player.name}`\n"
+                f"🏅 Level **{player.level}**{medal(player.level == best_level)}\n"
+                f"💀 **{player.kd_ratio or '-'} K/D**{medal(player.kd_ratio == best_kd)} ({player.kills} kills | {player.deaths} deaths)\n"
+                f"⚔️ **{player.win_ratio}** win rate{medal(player.wins / max(1, player.matches) == best_win_rate)} ({player.wins} wins in {player.matches} matches)" +
+                (f"\n🔫 {' | '.join(f"{weapon_label(weapon)} ({count:,})" for weapon, count in top_weapons)}" if top_weapons else '')
+            )))
+
+        if self.not_found:
+            self.container.add_item(discord.ui.Separator())
+            self.container.add_item(discord.ui.TextDisplay(content=(
+                f"-# 🛸 Unable to retrieve the stats of {', '.join(f"`{name}`" for name in self.not_found)}"
+            )))
+        if self.ignored:
+            self.container.add_item(discord.ui.TextDisplay(content=(
+                f"-# Only the first {MAX_COMPARED_PLAYERS} players are compared (ignored: {', '.join(f"`{name}`" for name in self.ignored)})"
+            )))
+        return self
 
 # ---------------------------------- game status
+LOADING = "⏳ *Loading...*"
+
 class GameStatusView(discord.ui.LayoutView):
     select_region_row = discord.ui.ActionRow()
 
-    def __init__(
-            self, bot: commands.Bot, game_version: str | None,
-            latest_game_update: datetime | None, latest_beta_update: datetime | None,
-            server_stats: tuple[datetime, list[GameRegion], GameRegion] | None
-        ):
+    def __init__(self, bot: commands.Bot, snapshot: GameStatusSnapshot | None, is_final: bool = False):
+        """ `is_final`: no follow-up edit will come, the sections still pending are shown as unavailable """
         super().__init__()
         self.container = discord.ui.Container(accent_color=discord.Color.dark_blue())
         self.add_item(self.container)
 
         self.bot = bot
-        self.game_version = game_version
-        self.latest_game_update = latest_game_update
-        self.latest_beta_update = latest_beta_update
-
+        self.taken_at = snapshot.taken_at if snapshot else None
+        self.game_version = snapshot.game_version if snapshot else None
+        self.latest_game_update = snapshot.latest_game_update if snapshot else None
+        self.latest_beta_update = snapshot.latest_beta_update if snapshot else None
+        self.stale_since = snapshot.stale_since if snapshot else None # the game services are down, the data is the last known one
+        self.pending = snapshot.pending if snapshot and not is_final else frozenset() # sections to be filled in by a follow-up edit
+
+        server_stats = snapshot.server_stats if snapshot else None
         self.is_ccu_fetched = bool(server_stats is not None)
         if self.is_ccu_fetched:
             _updated_at, _regions, _global_stats = server_stats
@@ -205,10 +276,14 @@ class GameStatusView(discord.ui.LayoutView):
 
         status_lines = []
         if self.is_ccu_fetched:
-            for region in self.regions.values():
-                status = await region.status
-                status_lines.append(f"- `{region.name}`: {status}")
+            statuses = await regions_status(self.bot.http_client, self.regions.values())
+            status_lines = [f"- `{region.name}`: {status}" for region, status in zip(self.regions.values(), statuses)]
 
+        if self.stale_since:
+            self.container.add_item(discord.ui.TextDisplay(content=(
+                f"> {DefaultEmojis.WARN} *The game services are not responding at the moment, "
+                f"the data below was last updated {discord.utils.format_dt(self.stale_since, 'R')}.*"
+            )))
         self.container.add_item(discord.ui.TextDisplay(content="To stay up to date with the latest news, check the following links"))
         announcements_channel = self.bot.get_channel(IDs.serverChannel.ANNOUNCEMENTS)
         self.container.add_item(discord.ui.ActionRow(
@@ -216,11 +291,16 @@ class GameStatusView(discord.ui.LayoutView):
             discord.ui.Button(url=GameUrl.UPDATES, style=discord.ButtonStyle.link, label="UPDATES")
         ))
         self.container.add_item(discord.ui.Separator())
+        def build_date(date: datetime | None, section: str) -> str:
+            if date:
+                return f"{discord.utils.format_dt(date)} ({discord.utils.format_dt(date, 'R')})"
+            return LOADING if section in self.pending else "*Unknown*"
         self.container.add_item(discord.ui.TextDisplay(content=(
             "### ⚙️ Latest game update" +
             (f"\nCurrent main game version: **{self.game_version}**" if self.game_version else '') +
-            f"\nMain version: {f"{discord.utils.format_dt(self.latest_game_update)} ({discord.utils.format_dt(self.latest_game_update, 'R')})" if self.latest_game_update else "*Unknown*"}"
-            f"\nBeta version: {f"{discord.utils.format_dt(self.latest_beta_update)} ({discord.utils.format_dt(self.latest_beta_update, 'R')})" if self.latest_beta_update else "*Unknown*"}"
+            (f"\nCurrent main game version: {LOADING}" if "game_version" in self.pending else '') +
+            f"\nMain version: {build_date(self.latest_game_update, "latest_game_update")}"
+            f"\nBeta version: {build_date(self.latest_beta_update, "latest_beta_update")}"
         )))
         if status_lines:
             self.container.add_item(discord.ui.Separator())
@@ -229,7 +309,9 @@ class GameStatusView(discord.ui.LayoutView):
             self.container.add_item(discord.ui.TextDisplay(content=f"Total knights around the world: **{self.global_stats.total}**"))
         self.container.add_item(discord.ui.Separator())
         content = "### 📊 Current CCU of repuls.io\n"
-        if not self.is_ccu_fetched:
+        if "server_stats" in self.pending:
+            content += LOADING
+        elif not self.is_ccu_fetched:
             content += "*Oh! We're sorry, but something went wrong... Unable to retrieve CCU.*"
         else:
             lines: list[str] = []
@@ -253,7 +335,9 @@ class GameStatusView(discord.ui.LayoutView):
                 default=(self.global_stats == self.selected_region)
             )
         self.container.add_item(discord.ui.TextDisplay(content=(
-            "-# Repuls live status" + (f" ・ (Data updated on {discord.utils.format_dt(self.updated_at)})" if self.is_ccu_fetched else FOOTER_EMBED)
+            "-# Repuls live status" +
+            (f" ・ (Data updated on {discord.utils.format_dt(self.updated_at)})" if self.is_ccu_fetched else FOOTER_EMBED) +
+            (f" ・ refreshed {discord.utils.format_dt(self.taken_at, 'R')}" if self.taken_at else '')
         )))
 
         return self
@@ -272,14 +356,19 @@ class StatsCog(commands.Cog, name=CogsNames.STATS):
     async def game_status(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        game_version = await fetch_game_version(self.bot.playfab_manager)
-        server_stats = await fetch_server_stats()
-        latest_game_update = await fetch_build_date(PublicAPI.BUILD)
-        latest_beta_update = await fetch_build_date(PublicAPI.BETA_BUILD)
-
-        view = GameStatusView(self.bot, game_version, latest_game_update, latest_beta_update, server_stats)
+        # refreshed in background (see GameStatusService), only the very first one may have to be awaited
+        snapshot = await self.bot.game_status.get(Deadline(GAME_STATUS_FIRST_RENDER_S))
+        view = GameStatusView(self.bot, snapshot)
         await view.generate_interface()
-        await interaction.followup.send(view=view, ephemeral=True)
+        message = await interaction.followup.send(view=view, ephemeral=True)
+
+        if snapshot and snapshot.pending:
+            # what arrived in time is shown first, the pending sections are filled in as soon as they are fetched
+            # (or shown as unavailable if they still aren't by the deadline)
+            snapshot = await self.bot.game_status.get(Deadline(GAME_STATUS_FETCH_DEADLINE_S))
+            view = GameStatusView(self.bot, snapshot, is_final=True)
+            await view.generate_interface()
+            await message.edit(view=view)
 
     @app_commands.command(description="Retrieves the precise in-game statistics of a given player")
     @app_commands.describe(name="The display name or username of the player to search for")
@@ -287,9 +376,86 @@ class StatsCog(commands.Cog, name=CogsNames.STATS):
         await interaction.response.defer(ephemeral=True)
 
         player = await fetch_player(self.bot.playfab_manager, name)
-        view = PlayerInfoView(name, player, interaction.user)
+        view = PlayerInfoView(self.bot, name, player, interaction.user)
         await view.generate_interface()
-        await interaction.followup.send(view=view, file=(view.attachment or discord.utils.MISSING), ephemeral=True)
+        await interaction.followup.send(view=view, ephemeral=True)
+
+    @app_commands.command(description="Compares the in-game statistics of several players side by side")
+    @app_commands.describe(names=f"Display names or usernames of the players (up to {MAX_COMPARED_PLAYERS}, separated by commas)")
+    async def player_compare(self, interaction: discord.Interaction, names: str):
+        await interaction.response.defer(ephemeral=True)
+
+        requested_names: list[str] = []
+        for name in (name.strip() for name in names.split(',')):
+            if name and name.lower() not in (requested.lower() for requested in requested_names):
+                requested_names.append(name)
+        if not requested_names:
+            await interaction.followup.send(f"> {DefaultEmojis.WARN} Please give at least one player name.", ephemeral=True)
+            return
+        ignored_names = requested_names[MAX_COMPARED_PLAYERS:]
+        requested_names = requested_names[:MAX_COMPARED_PLAYERS]
+
+        # one pipeline per player, all sharing the PlayFab session, rate limiter, caches and name lookups
+        # (not hedged: the hedges would take the rate limiter tokens that the other players are waiting for)
+        profiles = await asyncio.gather(*(fetch_player(self.bot.playfab_manager, name, hedged=False) for name in requested_names))
+        players = [player for player in profiles if player]
+        not_found = [name for name, player in zip(requested_names, profiles) if not player]
+
+        view = PlayerCompareView(players, not_found, ignored_names)
+        await view.generate_interface()
+        await interaction.followup.send(view=view, ephemeral=True)
+
+    @app_commands.command(description="Shows how much a player has progressed over a period (from the previous lookups of this player)")
+    @app_commands.describe(name="The display name of the player", period="The period over which to measure the progress")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="Last 24 hours", value=1),
+        app_commands.Choice(name="Last 7 days", value=7),
+        app_commands.Choice(name="Last 30 days", value=30),
+        app_commands.Choice(name="Since the first record", value=0)
+    ])
+    async def player_progress(self, interaction: discord.Interaction, name: str, period: app_commands.Choice[int]):
+        await interaction.response.defer(ephemeral=True)
+
+        container = discord.ui.Container(accent_color=discord.Color.dark_blue())
+        view = discord.ui.LayoutView()
+        view.add_item(container)
+
+        # only the snapshots recorded by the previous lookups are used, PlayFab is not called
+        playfab_id = await self.bot.player_storage.find_player_id(name)
+        since = datetime.now(timezone.utc) - timedelta(days=period.value) if period.value else None
+        progress = await self.bot.player_storage.get_progress(playfab_id, since) if playfab_id else None
+        if not progress:
+            container.add_item(discord.ui.TextDisplay(content=(
+                f"## 📈 No progress recorded for `{name}`\n"
+                "➜ *The progress of a player is measured between the lookups of its stats: use `/player_info` first!*"
+            )))
+            await interaction.followup.send(view=view, ephemeral=True)
+            return
+
+        (first_at, first), (last_at, last) = progress
+        delta = {key: last.get(key, 0) - first.get(key, 0) for key in first.keys() | last.keys()}
+        kills, deaths = delta.get("achievements.kills", 0), delta.get("achievements.deaths", 0)
+        matches, wins = delta.get("achievements.games", 0), delta.get("achievements.wins", 0)
+        weapons = sorted(
+            ((key.removeprefix("killStats."), count) for key, count in delta.items() if key.startswith("killStats.") and count > 0),
+            key=lambda item: item[1], reverse=True
+        )[:5]
+
+        content = (
+            f"## 📈 `{name}` progress ({period.name.lower()})\n"
+            f"-# Between {discord.utils.format_dt(first_at)} and {discord.utils.format_dt(last_at)}\n"
+        )
+        if first_at == last_at:
+            content += "*Only one lookup of this player has been recorded in this period, come back after the next one!*"
+        else:
+            content += (
+                f"🏅 Level **{first.get("level", 0)}** ➜ **{last.get("level", 0)}** (+{delta.get("xp", 0):,} XP)\n"
+                f"💀 **+{kills}** kills | **+{deaths}** deaths | **{round(kills / deaths, 2) if deaths else '-'} K/D** over the period\n"
+                f"⚔️ **+{matches}** matches, **+{wins}** wins (*{wins / max(1, matches) * 100:.1f}% win rate*)" +
+                ("\n## Most used weapons\n" + '\n'.join(f"> **{weapon_label(weapon)}**: +{count:,} kills" for weapon, count in weapons) if weapons else '')
+            )
+        container.add_item(discord.ui.TextDisplay(content=content))
+        await interaction.followup.send(view=view, ephemeral=True)
 
 async def setup(bot: "RepulsBot"):
     await bot.add_cog(StatsCog(bot))
\ No newline at end of file
@@ -10,9 +10,9 @@ from __future__ import annotations
 import discord
 from discord.ext import commands
 from discord import app_commands
+import math
 from typing import Sequence
 from enum import Enum
-import aiohttp
 from datetime import datetime
 # bot files
 from data.cogs import CogsNames
@@ -27,6 +27,12 @@ from data.faq import (
     GAME_FAQ_DATA
 )
 
+from tools.api_client import (
+    PublicAPI,
+    Deadline,
+    UpstreamUnavailable
+)
+
 def get_roles(roles: Sequence[discord.Role]) -> str:
     # https://stackoverflow.com/questions/68079391/discord-py-info-command-how-to-mention-roles-of-a-member
     return ' '.join([role.mention for role in roles if role.name != "@everyone"])
@@ -54,7 +60,6 @@ class WikiSearchModal(discord.ui.Modal, title="Search on wiki"):
         self.parent_view.latest_interaction = interaction
 
         assert isinstance(self.query.component, discord.ui.TextInput)
-        # see https://community.fandom.com/api.php and https://www.mediawiki.org/wiki/API:Search
         query = self.query.component.value
         params = {
             "action": "query",
@@ -65,18 +70,21 @@ class WikiSearchModal(discord.ui.Modal, title="Search on wiki"):
             "format": "json"
         }
         results = []
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{GameUrl.WIKI}/api.php", params=params) as resp:
-                data: dict = await resp.json()
-                for hit in dict(data.get("query", {})).get("search", []):
-                    assert isinstance(hit, dict)
-                    results.append({
-                        "title": hit["title"],
-                        "pageid": hit["pageid"],
-                        # "size": hit["size"],
-                        "wordcount": hit.get("wordcount", 0),
-                        "timestamp": datetime.fromisoformat(hit["timestamp"])
-                    })
+        try:
+            # the modal is answered without being deferred: the search must fit in the interaction deadline
+            data: dict = await self.parent_view.bot.http_client.get_json(PublicAPI.WIKI, params=params, deadline=Deadline.from_interaction(interaction))
+            self.parent_view.latest_wiki_unavailable = None
+        except UpstreamUnavailable as error:
+            data, self.parent_view.latest_wiki_unavailable = {}, error
+        for hit in dict(data.get("query", {})).get("search", []):
+            assert isinstance(hit, dict)
+            results.append({
+                "title": hit["title"],
+                "pageid": hit["pageid"],
+                # "size": hit["size"],
+                "wordcount": hit.get("wordcount", 0),
+                "timestamp": datetime.fromisoformat(hit["timestamp"])
+            })
 
         self.parent_view.latest_wiki_query = query
         self.parent_view.latest_wiki_result = results or None
@@ -105,6 +113,7 @@ class GameInfoView(discord.ui.LayoutView):
         self.current_view: GameInfoState = GameInfoState.HOME
         self.latest_wiki_query: str | None = None
         self.latest_wiki_result: list | None = None
+        self.latest_wiki_unavailable: UpstreamUnavailable | None = None # the wiki didn't answer the latest search
         self.latest_interaction: discord.Interaction | None = None
 
     def generate_interface(self, remove_componants: bool = False):
@@ -137,7 +146,14 @@ class GameInfoView(discord.ui.LayoutView):
             self.home_button.disabled = False
             self.server_faq_button.disabled = False
             self.game_faq_button.disabled = False
-            if self.latest_wiki_result:
+            if self.latest_wiki_unavailable:
+                # the host is known to be down (or too slow): no need to log it on every search
+                retry_after = self.latest_wiki_unavailable.retry_after
+                self.container.add_item(discord.ui.TextDisplay(content=(
+                    f"> 📡 *The wiki is not responding at the moment...*\n"
+                    f"> Try again {f"in {math.ceil(retry_after)} seconds" if retry_after else "in a moment"}?"
+                )))
+            elif self.latest_wiki_result:
                 self.container.add_item(discord.ui.TextDisplay(content=f"### 🔎 Wiki search - {len(self.latest_wiki_result)} result(s) for \"{self.latest_wiki_query}\""))
                 # https://www.mediawiki.org/wiki/Help:Page_ID#How_to_access_a_page_by_page_ID
                 for idx, result in enumerate(self.latest_wiki_result):
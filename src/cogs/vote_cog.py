@@ -198,7 +198,7 @@ class VoteCog(commands.Cog, name=CogsNames.VOTE):
             if forced_message:
                 video_url = get_yt_url(forced_message.content)
                 if video_url:
-                    status = await VideoSystemClient.send_video_to_endpoint(video_url)
+                    status = await VideoSystemClient.send_video_to_endpoint(self.bot.http_client, video_url)
                     if status == 200:
                         embed.description = f"{DefaultEmojis.CHECK} **Forced video** sent to repuls.io website {forced_message.jump_url}"
                         embed.color = discord.Color.brand_green()
@@ -255,7 +255,7 @@ class VoteCog(commands.Cog, name=CogsNames.VOTE):
         self.featured_video_task.change_interval(hours=next_interval)
         self.featured_check_interval = next_interval
 
-        status = await VideoSystemClient.send_video_to_endpoint(get_yt_url(chosen_msg.content))
+        status = await VideoSystemClient.send_video_to_endpoint(self.bot.http_client, get_yt_url(chosen_msg.content))
         if status == 200:
             await chosen_msg.add_reaction(ALREADY_USED_REACTION)
             embed.description = f"{DefaultEmojis.CHECK} Video sent to repuls.io website {chosen_msg.jump_url}"
@@ -418,7 +418,7 @@ class VoteCog(commands.Cog, name=CogsNames.VOTE):
                 accessory=discord.ui.Thumbnail(media=f"https://img.youtube.com/vi/{video_id}/mqdefault.jpg")
             ))
 
-        current_site_video, updated_at = await VideoSystemClient.get_website_featured_video()
+        current_site_video, updated_at = await VideoSystemClient.get_website_featured_video(self.bot.http_client)
         if current_site_video:
             info = f"➜ {current_site_video}" + f"\n*(updated at {discord.utils.format_dt(updated_at)})*" if updated_at else ''
             container.add_item(discord.ui.Separator())
@@ -0,0 +1,320 @@
+"""
+Watchlist of in-game players kept by the staff (suspected cheaters, esports rosters...):
+their profiles are checked in background and the changes are reported in a digest
+
+:copyright: (c) 2026-present pandaroux007
+:license: MIT, see LICENSE.txt for details.
+"""
+from __future__ import annotations
+import discord
+from discord import app_commands
+from discord.ext import (
+    commands,
+    tasks
+)
+
+import asyncio
+from datetime import (
+    datetime,
+    timedelta,
+    timezone
+)
+from typing import (
+    Optional,
+    TYPE_CHECKING
+)
+# bot files
+from data.cogs import CogsNames
+from tools.utils import plurial
+from tools.player_storage import WatchedPlayer
+from tools.api_client import (
+    RequestPriority,
+    PLAYFAB_RATE_PER_S
+)
+
+from tools.stats_parser import (
+    PlayerProfile,
+    fetch_player,
+    watch_player,
+    load_mod_history
+)
+
+from data.constants import (
+    DefaultEmojis,
+    ADMIN_CMD
+)
+
+from tools.log_builder import (
+    LogBuilder,
+    LogColor,
+    BOTLOG,
+    MODLOG,
+    log
+)
+
+if TYPE_CHECKING:
+    from main import RepulsBot
+
+WATCHLIST_SWEEP_MINUTES = 30
+WATCHLIST_RATE_SHARE = 0.2 # part of the PlayFab rate limit the sweeps may use (they are spread accordingly)
+WATCHLIST_LEVEL_JUMP = 3 # levels gained to be reported, since the level seen at the start of...
+WATCHLIST_LEVEL_WINDOW_HOURS = 24 # ...this window (the gains spread over several sweeps add up)
+WATCHLIST_MAX_SIZE = 200
+DIGEST_MAX_PLAYERS = 15 # players detailed in a digest, the others are only counted
+DIGEST_MAX_MESSAGE_CHARS = 3500 # players of a digest per message (components v2 messages are limited to 4000 characters)...
+DIGEST_MAX_PLAYER_CHARS = 1000 # ...and changes shown per player, the others are only counted
+
+def level_baseline(state: dict, level: int) -> tuple[int, datetime]:
+    """
+    Level (and its date) the current one is compared with: the one seen at the start of the window,
+    or the last one seen if the window is over (or if `state` has none, `level`)
+    """
+    now = datetime.now(timezone.utc)
+    if "level_baseline" in state:
+        baseline, seen_at = state["level_baseline"][0], datetime.fromisoformat(state["level_baseline"][1])
+        if now - seen_at < timedelta(hours=WATCHLIST_LEVEL_WINDOW_HOURS):
+            return (baseline, seen_at)
+    return (state.get("level", level), now)
+
+def watch_state(player: PlayerProfile, fingerprint: Optional[str], previous: Optional[dict] = None) -> dict:
+    """ What the sweeps compare from one to the next (see `PlayerStorage.save_watch_states`), `previous` being the last state """
+    baseline, seen_at = level_baseline(previous or {}, player.level)
+    if player.level - baseline >= WATCHLIST_LEVEL_JUMP: # reported, the next jump is measured from here
+        baseline, seen_at = player.level, datetime.now(timezone.utc)
+    return {
+        "fingerprint": fingerprint,
+        "level": player.level,
+        "level_baseline": [baseline, seen_at.isoformat()],
+        "clan": player.clan,
+        "mod_notes": len(player.mod_notes)
+    }
+
+def watch_changes(watched: WatchedPlayer, player: PlayerProfile) -> list[str]:
+    """
+    Readable list of the changes of `player` since the last state of `watched`
+    (its moderation history must be loaded if it has new notes, see `load_mod_history`)
+    """
+    state = watched.state
+    changes: list[str] = []
+    if player.name != watched.name:
+        changes.append(f"✏️ Renamed from `{watched.name}` to `{player.name}`")
+
+    known_notes = state.get("mod_notes", 0)
+    for entry in (player.mod_history or [])[known_notes:]:
+        changes.append(
+            f"🛡️ New mod note{f" by **{entry.moderator}**" if entry.moderator else ''}"
+            f"{f" ({discord.utils.format_dt(entry.created_at, 'R')})" if entry.created_at else ''}: "
+            f"{f"**{entry.title}** " if entry.title else ''}{entry.content or ''}"
+        )
+    if len(player.mod_notes) < known_notes:
+        removed = known_notes - len(player.mod_notes)
+        changes.append(f"🗑️ {removed} {plurial('mod note', removed)} removed")
+
+    baseline, seen_at = level_baseline(state, player.level)
+    if player.level - baseline >= WATCHLIST_LEVEL_JUMP:
+        changes.append(f"📈 Level **{baseline}** ➜ **{player.level}** (+{player.level - baseline} since {discord.utils.format_dt(seen_at, 'R')})")
+    if player.clan != state.get("clan"):
+        changes.append(f"🏷️ Clan {f"`[{state["clan"]}]`" if state.get("clan") else "*none*"} ➜ {f"`[{player.clan}]`" if player.clan else "*none*"}")
+    return changes
+
+def digest_field(changes: list[str]) -> str:
+    """ Changes of a player as shown in a digest (at most `DIGEST_MAX_PLAYER_CHARS` characters) """
+    lines: list[str] = []
+    length = 0
+    for shown, change in enumerate(changes):
+        line = f"> {change}"
+        if length + len(line) > DIGEST_MAX_PLAYER_CHARS - 50: # room kept for the line below
+            lines.append(f"> *...and {len(changes) - shown} other {plurial('change', len(changes) - shown)}*")
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)
+
+class WatchlistCog(commands.Cog, name=CogsNames.WATCHLIST):
+    def __init__(self, bot: RepulsBot):
+        self.bot = bot
+        self._restarted_after_error = False
+
+    def cog_load(self):
+        self.watchlist_sweep.start()
+
+    def cog_unload(self):
+        self.watchlist_sweep.cancel()
+
+    # ---------------------------------- task
+    @tasks.loop(minutes=WATCHLIST_SWEEP_MINUTES)
+    async def watchlist_sweep(self):
+        watchlist = await self.bot.player_storage.get_watchlist()
+        if not watchlist:
+            return
+
+        # one profile request per interval: the sweep never takes more than its share of the rate limit,
+        # and its requests (background priority) are overtaken by the commands anyway
+        interval = 1 / (PLAYFAB_RATE_PER_S * WATCHLIST_RATE_SHARE)
+        checks: list[asyncio.Task] = []
+        for index, watched in enumerate(watchlist):
+            if index:
+                await asyncio.sleep(interval)
+            checks.append(asyncio.create_task(self.check_player(watched)))
+        results = await asyncio.gather(*checks)
+
+        new_states: dict[str, tuple[str, dict]] = {}
+        reports: list[tuple[WatchedPlayer, PlayerProfile, list[str]]] = []
+        unavailable = 0
+        for watched, (fingerprint, player, changes) in zip(watchlist, results):
+            if fingerprint is None:
+                unavailable += 1
+                continue
+            if player is None: # same fingerprint, nothing was decoded
+                continue
+            if changes:
+                reports.append((watched, player, changes))
+            new_states[watched.playfab_id] = (player.name, watch_state(player, fingerprint, watched.state))
+
+        # the new states are only saved once their changes are reported, otherwise the next sweep reports them again
+        if reports and not await self.send_digest(reports, len(watchlist), unavailable):
+            return
+        await self.bot.player_storage.save_watch_states(new_states)
+
+    async def check_player(self, watched: WatchedPlayer) -> tuple[Optional[str], Optional[PlayerProfile], list[str]]:
+        """
+        Returns the fingerprint of the profile of `watched` (`None` if it couldn't be checked), the profile if it
+        changed, and the changes to report. A failure is logged and only makes the player unavailable for this sweep.
+        """
+        try:
+            fingerprint, player = await watch_player(self.bot.playfab_manager, watched.playfab_id, watched.state.get("fingerprint"), RequestPriority.BACKGROUND)
+            if player is None:
+                return (fingerprint, None, [])
+            if len(player.mod_notes) > watched.state.get("mod_notes", 0): # the moderators are only looked up for new notes
+                await load_mod_history(self.bot.playfab_manager, player, RequestPriority.BACKGROUND)
+            return (fingerprint, player, watch_changes(watched, player))
+        except Exception as e:
+            await log(
+                bot=self.bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Unable to check a watched player", msg=f"*Player: {watched.name} ({watched.playfab_id})*\n```\n{e}\n```"
+            )
+            return (None, None, [])
+
+    async def send_digest(self, reports: list[tuple[WatchedPlayer, PlayerProfile, list[str]]], checked: int, unavailable: int) -> bool:
+        """ Sends the digest of the changes, in several messages if needed. Returns whether it was entirely sent """
+        messages: list[list[tuple[str, str]]] = [[]]
+        length = 0
+        for watched, player, changes in reports[:DIGEST_MAX_PLAYERS]:
+            name = f"`{f"[{player.clan}] " if player.clan else ''}{player.name}`{f" *({watched.reason})*" if watched.reason else ''}"
+            value = digest_field(changes)
+            if messages[-1] and length + len(name) + len(value) > DIGEST_MAX_MESSAGE_CHARS:
+                messages.append([])
+                length = 0
+            messages[-1].append((name, value))
+            length += len(name) + len(value) + 8 # markdown of the field
+
+        title = f"👁️ Watchlist: {len(reports)} {plurial('player', len(reports))} changed"
+        try:
+            for index, fields in enumerate(messages):
+                digest = (
+                    LogBuilder(self.bot, type=MODLOG, color=LogColor.ORANGE)
+                    .title(f"{title} ({index + 1}/{len(messages)})" if len(messages) > 1 else title)
+                    .footer(
+                        f"{checked} {plurial('player', checked)} checked" +
+                        (f" | {unavailable} unavailable" if unavailable else '')
+                    )
+                )
+                for name, value in fields:
+                    digest.add_field(name=name, value=value)
+                if index == len(messages) - 1 and len(reports) > DIGEST_MAX_PLAYERS:
+                    digest.description(f"*...and {len(reports) - DIGEST_MAX_PLAYERS} other {plurial('player', len(reports) - DIGEST_MAX_PLAYERS)} (see `/watchlist view`)*")
+                await digest.send()
+        except Exception as e:
+            await log(
+                bot=self.bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Unable to send the watchlist digest", msg=f"```\n{e}\n```"
+            )
+            return False
+        return True
+
+    # ---------------------------------- initialization
+    @watchlist_sweep.before_loop
+    async def before_watchlist_sweep(self):
+        await self.bot.wait_until_ready()
+        if self._restarted_after_error: # not right away, the cause of the error may still be there
+            self._restarted_after_error = False
+            await asyncio.sleep(WATCHLIST_SWEEP_MINUTES * 60)
+
+    @watchlist_sweep.error
+    async def on_watchlist_sweep_error(self, error: BaseException):
+        await log(
+            bot=self.bot, type=BOTLOG, color=LogColor.RED,
+            title=f"{DefaultEmojis.ERROR} The watchlist sweep failed", msg=f"```\n{error}\n```"
+        )
+        # the loop stops on an unhandled error: it is started again once it is over
+        self._restarted_after_error = True
+        self.watchlist_sweep.get_task().add_done_callback(self._restart_watchlist_sweep)
+
+    def _restart_watchlist_sweep(self, task: asyncio.Task) -> None:
+        if task.cancelled(): # the cog was unloaded
+            return
+        task.exception() # already logged by the error handler
+        self.watchlist_sweep.start()
+
+    # ---------------------------------- discord commands
+    watchlist = app_commands.Group(
+        name="watchlist", guild_only=True, default_permissions=ADMIN_CMD,
+        description="[ADMIN] Allows you to manage the watchlist of in-game players"
+    )
+
+    @watchlist.command(description="[ADMIN] Adds an in-game player to the watchlist")
+    @app_commands.describe(name="Display name or username of the player", reason="Why this player is watched")
+    async def add(self, interaction: discord.Interaction, name: str, reason: Optional[str] = None):
+        await interaction.response.defer(ephemeral=True)
+        if len(await self.bot.player_storage.get_watchlist()) >= WATCHLIST_MAX_SIZE:
+            await interaction.followup.send(f"> {DefaultEmojis.ERROR} The watchlist is full ({WATCHLIST_MAX_SIZE} players), remove someone first.", ephemeral=True)
+            return
+
+        player = await fetch_player(self.bot.playfab_manager, name)
+        if not player:
+            await interaction.followup.send(f"> {DefaultEmojis.ERROR} Unable to find the player `{name}`.", ephemeral=True)
+            return
+        # no fingerprint yet: the first sweep compares the profile with this state
+        if await self.bot.player_storage.add_watched_player(player.playfab_id, player.name, reason, interaction.user.id, watch_state(player, None)):
+            await interaction.followup.send(f"> {DefaultEmojis.CHECK} `{player.name}` is now on the watchlist.", ephemeral=True)
+        else:
+            await interaction.followup.send(f"> {DefaultEmojis.WARN} `{player.name}` is already on the watchlist (or it couldn't be saved).", ephemeral=True)
+
+    @watchlist.command(description="[ADMIN] Removes an in-game player from the watchlist")
+    @app_commands.describe(name="Name of the player, as shown by /watchlist view")
+    async def remove(self, interaction: discord.Interaction, name: str):
+        if await self.bot.player_storage.remove_watched_player(name):
+            await interaction.response.send_message(f"> {DefaultEmojis.CHECK} `{name}` has been removed from the watchlist.", ephemeral=True)
+        else:
+            await interaction.response.send_message(f"> {DefaultEmojis.ERROR} `{name}` isn't on the watchlist.", ephemeral=True)
+
+    @watchlist.command(description="[ADMIN] Shows the watched in-game players")
+    async def view(self, interaction: discord.Interaction):
+        watchlist = await self.bot.player_storage.get_watchlist()
+        container = discord.ui.Container(accent_color=discord.Color.dark_blue())
+        container.add_item(discord.ui.TextDisplay(content=f"## 👁️ Watchlist ({len(watchlist)}/{WATCHLIST_MAX_SIZE})"))
+        container.add_item(discord.ui.Separator())
+        if not watchlist:
+            container.add_item(discord.ui.TextDisplay(content="*Nobody is watched for now, see `/watchlist add`*"))
+        else:
+            lines = [
+                f"- `{watched.name}` | level {watched.state.get("level", '?')} | {watched.state.get("mod_notes", 0)} mod notes"
+                f"{f"\n  -# {watched.reason}" if watched.reason else ''}"
+                f"\n  -# added by <@{watched.added_by}> {discord.utils.format_dt(watched.added_at, 'R')}"
+                for watched in watchlist
+            ]
+            # TextDisplay contents are limited to 4000 characters
+            content = ''
+            for shown, line in enumerate(lines):
+                if len(content) + len(line) > 3900:
+                    content += f"\n*...and {len(lines) - shown} others*"
+                    break
+                content += ('\n' if content else '') + line
+            container.add_item(discord.ui.TextDisplay(content=content))
+
+        view = discord.ui.LayoutView()
+        view.add_item(container)
+        await interaction.response.send_message(view=view, ephemeral=True)
+
+async def setup(bot: RepulsBot):
+    await bot.add_cog(WatchlistCog(bot))
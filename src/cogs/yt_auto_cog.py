@@ -6,7 +6,6 @@ Task to automatically retrieve videos about repuls.io from YouTube
 :license: MIT, see LICENSE.txt for details.
 """
 
-import aiohttp
 from discord.ext import (
     tasks,
     commands
@@ -25,6 +24,7 @@ from data.constants import (
     IDs
 )
 
+from tools.api_client import read_json
 from tools.log_builder import (
     LogColor,
     BOTLOG,
@@ -80,45 +80,43 @@ class YTAutoCog(commands.Cog, name=CogsNames.YT_AUTO):
         :Original creator: amanlovescat
         :Modifications for production: pandaroux007
         """
-        async with aiohttp.ClientSession() as session:
-            for key in getattr(PrivateData, "YOUTUBE_KEYS", []):
-                if not key:
-                    continue
+        for key in getattr(PrivateData, "YOUTUBE_KEYS", []):
+            if not key:
+                continue
 
-                one_day_ago = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
-                params = {
-                    "key": key,
-                    "part": "snippet",
-                    "q": SEARCH_QUERY,
-                    "type": "video",
-                    "order": "date",
-                    "publishedAfter": one_day_ago,
-                    "maxResults": MAX_RESULTS
-                }
-
-                try:
-                    async with session.get(YOUTUBE_SEARCH_URL, params=params) as r:
-                        data = await r.json()
-                        if "error" in data:
-                            continue
-                        new_vids = []
-                        for video in data.get("items", []):
-                            id = video.get("id", {}).get("videoId")
-                            if not id:
-                                continue
-                            try:
-                                inserted = await self.bot.youtube_storage.add_posted_video(id)
-                            except Exception:
-                                inserted = False
-                            if inserted:
-                                new_vids.append(id)
-                        return new_vids
-                except Exception as e:
-                    await log(
-                        bot=self.bot, type=BOTLOG, color=LogColor.RED,
-                        title=f"{DefaultEmojis.ERROR} Error with one of the YouTube APIs", msg=f"```\n{e}\n```"
-                    )
+            one_day_ago = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+            params = {
+                "key": key,
+                "part": "snippet",
+                "q": SEARCH_QUERY,
+                "type": "video",
+                "order": "date",
+                "publishedAfter": one_day_ago,
+                "maxResults": MAX_RESULTS
+            }
+
+            try:
+                data = await self.bot.http_client.request("GET", YOUTUBE_SEARCH_URL, read_json, params=params)
+                if "error" in data:
                     continue
+                new_vids = []
+                for video in data.get("items", []):
+                    id = video.get("id", {}).get("videoId")
+                    if not id:
+                        continue
+                    try:
+                        inserted = await self.bot.youtube_storage.add_posted_video(id)
+                    except Exception:
+                        inserted = False
+                    if inserted:
+                        new_vids.append(id)
+                return new_vids
+            except Exception as e:
+                await log(
+                    bot=self.bot, type=BOTLOG, color=LogColor.RED,
+                    title=f"{DefaultEmojis.ERROR} Error with one of the YouTube APIs", msg=f"```\n{e}\n```"
+                )
+                continue
 
         return []
 
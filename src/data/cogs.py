@@ -11,6 +11,7 @@ class CogsNames:
     STATS = "stats_cog"
     GAME_BROWSER = "game_browser_cog"
     YT_AUTO = "yt_auto_cog"
+    WATCHLIST = "watchlist_cog"
 
 COGS_LIST = [
     CogsNames.VOTE,
@@ -23,4 +24,5 @@ COGS_LIST = [
     CogsNames.STATS,
     CogsNames.GAME_BROWSER,
     CogsNames.YT_AUTO,
+    CogsNames.WATCHLIST,
 ]
\ No newline at end of file
@@ -11,6 +11,7 @@ ADMIN_CMD = discord.Permissions(administrator=True)
 DISCORD_MSG_ID_REGEX = r"(\d{17,20})$"
 
 DB_PATH = Path(__file__).parent.parent / "data" / "storage.db"
+CACHE_DIR = Path(__file__).parent.parent / "data" / "cache" # disposable files (rendered images...)
 
 # ------------------------------------- env file's data
 _ENV_FILE = Path(__file__).parent / ".env"
@@ -28,6 +29,8 @@ class PrivateData:
         os.getenv("YOUTUBE_KEY2"),
         os.getenv("YOUTUBE_KEY3")
     ]
+    # offline mode: all upstream requests are sent to this local stand-in server (see tools/fake_upstream.py)
+    UPSTREAM_BASE_URL = os.getenv("UPSTREAM_BASE_URL")
 
 _MODE = os.getenv("ENV", "prod")
 _MODE_DEV = "dev"
@@ -2,12 +2,22 @@
 import discord
 from discord.ext import commands
 import asqlite
+import asyncio
+import time
 # bot files
 from data.cogs import COGS_LIST
 from tools.youtube_storage import YouTubeStorage
 from tools.tickets_storage import TicketsStorage
 from tools.moderation_storage import ModerationStorage
-from tools.api_client import PlayFabClient
+from tools.upstream_storage import UpstreamStorage
+from tools.player_storage import PlayerStorage
+from tools.api_client import (
+    PlayFabClient,
+    HTTPClient
+)
+from tools.stats_parser import warm_up
+from tools.color_theme import color_themes
+from tools.game_status import GameStatusService
 from data.constants import (
     PrivateData,
     IDs,
@@ -23,7 +33,12 @@ class RepulsBot(commands.Bot):
         self.youtube_storage: YouTubeStorage = None
         self.tickets_storage: TicketsStorage = None
         self.moderation_storage: ModerationStorage = None
+        self.upstream_storage: UpstreamStorage = None
+        self.player_storage: PlayerStorage = None
+        self.http_client: HTTPClient = None
         self.playfab_manager: PlayFabClient = None
+        self.game_status: GameStatusService = None
+        self.warm_up_task: asyncio.Task | None = None
 
     async def setup_database(self) -> None:
         self.db_pool = await asqlite.create_pool(DB_PATH)
@@ -37,11 +52,22 @@ class RepulsBot(commands.Bot):
         await self.tickets_storage.init_tables()
         self.moderation_storage = ModerationStorage(self, self.db_pool)
         await self.moderation_storage.init_tables()
+        self.upstream_storage = UpstreamStorage(self, self.db_pool)
+        await self.upstream_storage.init_tables()
+        self.player_storage = PlayerStorage(self, self.db_pool)
+        await self.player_storage.init_tables()
 
     async def setup_hook(self) -> None:
         await self.setup_database()
 
-        self.playfab_manager = PlayFabClient(self)
+        self.http_client = HTTPClient(self, self.upstream_storage)
+        await self.http_client.start()
+        self.playfab_manager = PlayFabClient(self, self.http_client, self.player_storage)
+        self.playfab_manager.start()
+        self.game_status = GameStatusService(self.http_client, self.playfab_manager)
+        self.game_status.start()
+        # runs alongside the cogs loading, without delaying the bot readiness
+        self.warm_up_task = asyncio.create_task(self.warm_up())
 
         for cog_name in COGS_LIST:
             await self.load_extension(f"cogs.{cog_name}")
@@ -50,7 +76,21 @@ class RepulsBot(commands.Bot):
         synced = await self.tree.sync()
         print(f"{len(synced)} command(s) have been synchronized")
 
+    async def warm_up(self) -> None:
+        started_at = time.monotonic()
+        succeeded, total = await warm_up(self.http_client, self.playfab_manager)
+        print(f"Warm-up done in {time.monotonic() - started_at:.1f}s ({succeeded}/{total} steps succeeded)")
+
     async def close(self) -> None:
+        if self.warm_up_task is not None and not self.warm_up_task.done():
+            self.warm_up_task.cancel()
+        if self.game_status is not None:
+            await self.game_status.close()
+        if self.playfab_manager is not None:
+            await self.playfab_manager.close()
+        if self.http_client is not None:
+            await self.http_client.close()
+        color_themes.close()
         await self.db_pool.close()
         await super().close()
 
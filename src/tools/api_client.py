@@ -5,9 +5,33 @@ here is some useful documentation to understand asynchronous HTTP clients.
 - https://docs.aiohttp.org/en/stable/client_quickstart.html
 """
 
+import discord
 from discord.ext import commands
 import aiohttp
+import asyncio
 import datetime
+import heapq
+import itertools
+import random
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from urllib.parse import (
+    urlencode,
+    urlsplit
+)
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Hashable,
+    Mapping,
+    TypeVar,
+    TYPE_CHECKING
+)
 # bot files
 from data.constants import (
     PrivateData,
@@ -21,6 +45,20 @@ from tools.log_builder import (
     log
 )
 
+from tools.http_metrics import (
+    HTTPMetrics,
+    RequestSample,
+    make_trace_config
+)
+
+from tools.json_codec import loads as json_loads
+
+if TYPE_CHECKING:
+    from tools.upstream_storage import UpstreamStorage
+    from tools.player_storage import PlayerStorage
+
+T = TypeVar("T")
+
 class PublicAPI:
     CCU = "https://stats.docskigames.com/api/ccu-current"
     FEATURED_VIDEO = "https://community.docskigames.com/api/feature-video"
@@ -31,6 +69,8 @@ class PublicAPI:
     REGIONS = "https://regions.docskigames.com/getServers"
     REGION_PING = "https://rep.{region}.docskigames.com/ping"
     GET_GAME_LIST = "https://rep.{region}.docskigames.com/serverList"
+    # see https://community.fandom.com/api.php and https://www.mediawiki.org/wiki/API:Search
+    WIKI = f"{GameUrl.WIKI}/api.php"
 
 class PlayFabAPI:
     TITLE_ID = "df3ef"
@@ -42,46 +82,672 @@ class PlayFabAPI:
     GET_PLAYER_DATA = f"{BASE_URL}/ExecuteCloudScript"
     # GET_CATALOG = f"{BASE_URL}/GetCatalogItems"
 
+# ---------------------------------- instrumentation
+class EndpointFamily:
+    """ Groups of endpoints under which the requests are measured (see `tools.http_metrics`) """
+    PLAYFAB_LOGIN = "PlayFab login"
+    PLAYFAB_CLOUDSCRIPT = "CloudScript"
+    PLAYFAB_ACCOUNT = "PlayFab account"
+    PLAYFAB_TITLE_DATA = "PlayFab title data"
+    CCU = "CCU"
+    REGIONS = "regions"
+    SERVER_LIST = "serverList"
+    PING = "ping"
+    BUILD = "build files"
+    WIKI = "wiki"
+    YOUTUBE = "YouTube"
+    VIDEO_ENDPOINT = "video endpoint"
+    OTHER = "other"
+
+_ENDPOINT_FAMILIES = {
+    PlayFabAPI.LOGIN: EndpointFamily.PLAYFAB_LOGIN,
+    PlayFabAPI.GET_PLAYER_DATA: EndpointFamily.PLAYFAB_CLOUDSCRIPT,
+    PlayFabAPI.SEARCH_PLAYER: EndpointFamily.PLAYFAB_ACCOUNT,
+    PlayFabAPI.GET_GAME_VERSION: EndpointFamily.PLAYFAB_TITLE_DATA,
+    PublicAPI.CCU: EndpointFamily.CCU,
+    PublicAPI.REGIONS: EndpointFamily.REGIONS,
+    PublicAPI.BUILD: EndpointFamily.BUILD,
+    PublicAPI.BETA_BUILD: EndpointFamily.BUILD,
+    PublicAPI.WIKI: EndpointFamily.WIKI,
+    PublicAPI.FEATURED_VIDEO: EndpointFamily.VIDEO_ENDPOINT,
+    PrivateData.VIDEO_ENDPOINT_URL: EndpointFamily.VIDEO_ENDPOINT
+}
+
+def endpoint_family(url: str) -> str:
+    parts = urlsplit(url)
+    family = _ENDPOINT_FAMILIES.get(f"{parts.scheme}://{parts.netloc}{parts.path}")
+    if family:
+        return family
+    if parts.hostname and parts.hostname.startswith("rep."): # rep.{region}.docskigames.com
+        if parts.path == "/serverList":
+            return EndpointFamily.SERVER_LIST
+        if parts.path == "/ping":
+            return EndpointFamily.PING
+    if parts.hostname == "www.googleapis.com":
+        return EndpointFamily.YOUTUBE
+    return EndpointFamily.OTHER
+
+# ---------------------------------- bounded response bodies
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+MAX_BODY_BYTES = { # bodies larger than that are rejected without being read entirely
+    EndpointFamily.PLAYFAB_LOGIN: 64 * 1024,
+    EndpointFamily.PLAYFAB_ACCOUNT: 64 * 1024,
+    EndpointFamily.PLAYFAB_TITLE_DATA: 256 * 1024,
+    EndpointFamily.PLAYFAB_CLOUDSCRIPT: 1024 * 1024,
+    EndpointFamily.CCU: 256 * 1024,
+    EndpointFamily.REGIONS: 64 * 1024,
+    EndpointFamily.SERVER_LIST: 2 * 1024 * 1024,
+    EndpointFamily.PING: 4 * 1024,
+    EndpointFamily.WIKI: 512 * 1024,
+    EndpointFamily.YOUTUBE: 512 * 1024,
+    EndpointFamily.VIDEO_ENDPOINT: 64 * 1024
+}
+BODY_CHUNK_BYTES = 64 * 1024
+
+# size ceiling of the body being read, set by `HTTPClient.request` for its handler
+_max_body_bytes: ContextVar[int] = ContextVar("max_body_bytes", default=DEFAULT_MAX_BODY_BYTES)
+
+class ResponseTooLarge(Exception):
+    def __init__(self, url: str, limit: int):
+        super().__init__(f"The response body of {url} exceeds {limit} bytes")
+        self.url = url
+        self.limit = limit
+
+async def read_body(resp: aiohttp.ClientResponse) -> bytearray:
+    """
+    Reads the response body chunk by chunk, up to the size ceiling of its endpoint (see `MAX_BODY_BYTES`).
+    Raises `ResponseTooLarge` as soon as the ceiling is exceeded (or announced by the Content-Length),
+    without downloading the rest of the body.
+    """
+    limit = _max_body_bytes.get()
+    if resp.content_length is not None and resp.content_length > limit:
+        raise ResponseTooLarge(str(resp.url), limit)
+    body = bytearray()
+    async for chunk in resp.content.iter_chunked(BODY_CHUNK_BYTES):
+        body += chunk
+        if len(body) > limit:
+            raise ResponseTooLarge(str(resp.url), limit)
+    return body
+
+async def read_json(resp: aiohttp.ClientResponse) -> Any:
+    """ Basic response handler for `HTTPClient.request`, decodes the body whatever its content type """
+    return json_loads(await read_body(resp))
+
+# ---------------------------------- request coalescing
+class SingleFlight():
+    """
+    Concurrent calls for the same key share a single task. Callers wait for it through `asyncio.shield`,
+    so a cancelled caller (e.g. expired interaction) doesn't abort it for the others, and the error of
+    a task that nobody awaits anymore (background refresh, caller gone) is retrieved instead of reported.
+    """
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    def start(self, key: Hashable, work: Callable[[], Coroutine[Any, Any, T]]) -> asyncio.Task:
+        """ Returns the task in progress for `key`, or runs `work` as this task if there is none """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.create_task(work())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._on_done(key, done))
+        return task
+
+    async def run(self, key: Hashable, work: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        """ Same as `start`, but waits for the result of the task """
+        return await asyncio.shield(self.start(key, work))
+
+    def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+
+    def _on_done(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()
+
+# ---------------------------------- response cache
+@dataclass(frozen=True)
+class CachePolicy:
+    ttl: float # seconds during which a response is served as is
+    stale_ttl: float = 0 # extra seconds during which it is still served, but refreshed in the background
+
+# cache lifetime of each endpoint (the key is the url *before* formatting)
+ENDPOINT_CACHE_POLICIES: dict[str, CachePolicy] = {
+    PublicAPI.CCU: CachePolicy(ttl=30, stale_ttl=90),
+    PublicAPI.REGIONS: CachePolicy(ttl=10 * 60, stale_ttl=60 * 60),
+    PublicAPI.GET_GAME_LIST: CachePolicy(ttl=10, stale_ttl=20),
+    PublicAPI.BUILD: CachePolicy(ttl=5 * 60, stale_ttl=60 * 60),
+    PublicAPI.BETA_BUILD: CachePolicy(ttl=5 * 60, stale_ttl=60 * 60),
+    PlayFabAPI.GET_GAME_VERSION: CachePolicy(ttl=5 * 60, stale_ttl=60 * 60)
+}
+
+@dataclass(frozen=True)
+class CacheHit:
+    fetched_at: datetime.datetime # when the value served was fetched from the upstream
+    stale: bool # served past its TTL, and its last revalidation failed
+
+# value served by the last `ResponseCache.get` of the current context, `None` if it was fetched for the caller
+cache_hit: ContextVar[CacheHit | None] = ContextVar("cache_hit", default=None)
+
+class ResponseCache():
+    """
+    In-memory TTL cache with stale-while-revalidate and request coalescing: concurrent
+    requests for the same key share a single upstream fetch.
+    NOTE: `None` results (failures) are never stored, so the next call tries again.
+    The age of a value served from the cache is exposed to the caller through `cache_hit`.
+    """
+    def __init__(self):
+        self._entries: dict[str, tuple[float, Any]] = {} # key -> (monotonic fetch time, value)
+        self._failed_revalidations: set[str] = set()
+        self._in_flight = SingleFlight()
+
+    async def get(self, key: str, fetch: Callable[[], Awaitable[Any]], policy: CachePolicy) -> Any:
+        entry = self._entries.get(key)
+        if entry:
+            fetched_at, value = entry
+            age = time.monotonic() - fetched_at
+            if age <= policy.ttl + policy.stale_ttl:
+                stale = age > policy.ttl
+                if stale:
+                    self._in_flight.start(key, lambda: self._fetch(key, fetch))
+                cache_hit.set(CacheHit(
+                    fetched_at=datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=age),
+                    stale=stale and key in self._failed_revalidations
+                ))
+                return value
+        cache_hit.set(None)
+        return await self._in_flight.run(key, lambda: self._fetch(key, fetch))
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+        except Exception:
+            if key in self._entries:
+                self._failed_revalidations.add(key)
+            raise
+        if value is not None:
+            self._entries[key] = (time.monotonic(), value)
+            self._failed_revalidations.discard(key)
+        elif key in self._entries:
+            self._failed_revalidations.add(key)
+        return value
+
+# ---------------------------------- conditional requests
+# https://developer.mozilla.org/en-US/docs/Web/HTTP/Guides/Conditional_requests
+CONDITIONAL_ENDPOINTS = {
+    PublicAPI.BUILD,
+    PublicAPI.BETA_BUILD,
+    PublicAPI.REGIONS,
+    PublicAPI.WIKI
+}
+MAX_STORED_VALIDATORS = 256 # the wiki can receive any query, so the store is bounded (LRU)
+
+class ValidatorStore():
+    """
+    Remembers the validators (`ETag` and `Last-Modified`) of the last response of each
+    conditional request, along with its payload, to serve it again when the server answers 304.
+    """
+    def __init__(self, max_entries: int = MAX_STORED_VALIDATORS):
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str | None, str | None, Any]] = OrderedDict()
+
+    def conditional_headers(self, key: str) -> dict[str, str]:
+        entry = self._entries.get(key)
+        if not entry:
+            return {}
+        etag, last_modified, _ = entry
+        headers: dict[str, str] = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def store(self, key: str, headers: Mapping[str, str], payload: Any) -> None:
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (etag, last_modified, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+def upstream_url(url: str) -> str:
+    """
+    Offline mode: if `UPSTREAM_BASE_URL` is set, `https://host/path?query` becomes `UPSTREAM_BASE_URL/host/path?query`
+    """
+    if not PrivateData.UPSTREAM_BASE_URL:
+        return url
+    parts = urlsplit(url)
+    return f"{PrivateData.UPSTREAM_BASE_URL.rstrip('/')}/{parts.hostname}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+
+def request_key(url: str, params: dict | None = None) -> str:
+    """ Identifies a request by its url and (sorted) query parameters """
+    return f"{url}?{urlencode(sorted(params.items()))}" if params else url
+
+# ---------------------------------- resilience (deadlines, retries, circuit breakers)
+DEFAULT_DEADLINE_S = 10 # for calls that are not tied to an interaction
+# https://discord.com/developers/docs/interactions/receiving-and-responding#responding-to-an-interaction
+INTERACTION_RESPONSE_BUDGET_S = 3
+INTERACTION_RESPONSE_MARGIN_S = 0.5 # time kept to send the response itself
+MIN_DEADLINE_S = 0.5
+
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+MAX_RETRIES = 2 # only for idempotent methods
+RETRY_BASE_DELAY_S = 0.2 # full jitter: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/
+TRANSIENT_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+BREAKER_FAILURE_THRESHOLD = 5 # consecutive failures before a host is considered down...
+BREAKER_RESET_TIMEOUT_S = 30 # ...and the time before a new attempt is allowed
+
+class UpstreamUnavailable(Exception):
+    """
+    Raised when an upstream host cannot answer in time: its circuit breaker is open,
+    the call deadline has expired, or all the attempts have failed.
+    """
+    def __init__(self, host: str, retry_after: float | None = None):
+        self.host = host
+        self.retry_after = retry_after
+        super().__init__(f"{host} is unavailable" + (f" (retry in {retry_after:.0f}s)" if retry_after else ''))
+
+class Deadline():
+    """ Point in time (monotonic) after which a call is no longer useful to its caller """
+    def __init__(self, timeout: float):
+        self._expires_at = time.monotonic() + max(timeout, MIN_DEADLINE_S)
+
+    @classmethod
+    def from_interaction(cls, interaction: discord.Interaction) -> "Deadline":
+        """
+        Budget left to answer the interaction: Discord requires an initial response within 3 seconds,
+        a deferred interaction gets the default budget (the user is still waiting in front of it).
+        """
+        if interaction.response.is_done():
+            return cls(DEFAULT_DEADLINE_S)
+        elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+        elapsed = min(max(elapsed, 0), INTERACTION_RESPONSE_BUDGET_S) # clock skew with Discord
+        return cls(INTERACTION_RESPONSE_BUDGET_S - INTERACTION_RESPONSE_MARGIN_S - elapsed)
+
+    @property
+    def remaining(self) -> float:
+        return max(0.0, self._expires_at - time.monotonic())
+
+class CircuitBreaker():
+    """
+    Per-host breaker: after `BREAKER_FAILURE_THRESHOLD` consecutive failures, calls fail fast for
+    `BREAKER_RESET_TIMEOUT_S`, then a single probe is let through (half-open) to test the host again.
+    """
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT_S):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures: int = 0
+        self._opened_at: float | None = None
+        self._probe_started_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    @property
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self._reset_timeout:
+            return False
+        # half-open (a probe that never reported back, e.g. cancelled, doesn't block the breaker forever)
+        if self._probe_started_at is not None and now - self._probe_started_at < self._reset_timeout:
+            return False
+        self._probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._probe_started_at is not None or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+        self._probe_started_at = None
+
+# ---------------------------------- shared http client
+# https://docs.aiohttp.org/en/stable/client_advanced.html#limiting-connection-pool-size
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_CONNECTIONS_PER_HOST = 10
+HTTP_KEEPALIVE_S = 60
+HTTP_DNS_CACHE_TTL_S = 300
+
+class HTTPClient():
+    """
+    Bot-wide pooled HTTP client, created in `RepulsBot.setup_hook` and closed in `RepulsBot.close`.
+    All outbound calls share the same `aiohttp.ClientSession`, so TCP/TLS connections are kept alive
+    and reused between requests (and DNS resolutions are cached) instead of being renegotiated each time.
+    """
+    def __init__(self, bot: commands.Bot, last_known_good: "UpstreamStorage | None" = None):
+        self._bot = bot
+        self._session: aiohttp.ClientSession | None = None
+        self.last_known_good = last_known_good
+        self.cache = ResponseCache()
+        self.validators = ValidatorStore()
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.metrics = HTTPMetrics()
+
+    async def start(self) -> None:
+        if self._session and not self._session.closed:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_S,
+            use_dns_cache=True,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL_S
+        )
+        self._session = aiohttp.ClientSession(connector=connector, trace_configs=[make_trace_config()])
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if not self._session or self._session.closed:
+            raise RuntimeError("The HTTP client is not started (HTTPClient.start must be awaited first)")
+        return self._session
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        host = urlsplit(url).hostname or url
+        return self._breakers.setdefault(host, CircuitBreaker())
+
+    async def request(
+        self, method: str, url: str, handler: Callable[[aiohttp.ClientResponse], Awaitable[T]],
+        deadline: Deadline | None = None, **kwargs
+    ) -> T:
+        """
+        Sends a request through the resilience layer and returns what `handler` made of the response.
+        - each attempt is bounded by `deadline` (`DEFAULT_DEADLINE_S` if not given)
+        - idempotent methods are retried on network errors and 5xx, with a jittered backoff
+        - the host circuit breaker makes calls fail fast while the host is down
+        - the response body is bounded by the size ceiling of the endpoint, if `handler` reads it with `read_body`
+
+        Raises `UpstreamUnavailable` if no usable response could be obtained, `ResponseTooLarge` if the body is too large.
+        """
+        deadline = deadline or Deadline(DEFAULT_DEADLINE_S)
+        breaker = self.breaker(url)
+        host = urlsplit(url).hostname or url
+        is_idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempts = 1 + (MAX_RETRIES if is_idempotent else 0)
+        family = endpoint_family(url)
+        last_error: BaseException | None = None
+
+        for attempt in range(attempts):
+            if attempt:
+                delay = random.uniform(0, RETRY_BASE_DELAY_S * 2 ** (attempt - 1))
+                if delay >= deadline.remaining:
+                    break
+                await asyncio.sleep(delay)
+            if not breaker.allow():
+                raise UpstreamUnavailable(host, breaker.retry_after) from last_error
+            if deadline.remaining <= 0:
+                break
+
+            sample = RequestSample(started_at=time.monotonic())
+            response: aiohttp.ClientResponse | None = None
+            try:
+                timeout = aiohttp.ClientTimeout(total=deadline.remaining)
+                async with self.session.request(method, upstream_url(url), timeout=timeout, trace_request_ctx=sample, **kwargs) as resp:
+                    response = resp
+                    sample.status = resp.status
+                    if resp.status >= 500:
+                        breaker.record_failure()
+                        if is_idempotent: # the last 5xx is raised as `UpstreamUnavailable` below, like a network error
+                            last_error = aiohttp.ClientResponseError(resp.request_info, resp.history, status=resp.status)
+                            continue
+                    else:
+                        breaker.record_success()
+                    max_body_token = _max_body_bytes.set(MAX_BODY_BYTES.get(family, DEFAULT_MAX_BODY_BYTES))
+                    try:
+                        return await handler(resp)
+                    finally:
+                        _max_body_bytes.reset(max_body_token)
+            except ResponseTooLarge:
+                sample.body_rejected = True
+                raise
+            except TRANSIENT_ERRORS as error:
+                breaker.record_failure()
+                sample.timed_out = isinstance(error, asyncio.TimeoutError)
+                sample.body_truncated = isinstance(error, aiohttp.ClientPayloadError)
+                last_error = error
+            finally:
+                sample.latency_s = time.monotonic() - sample.started_at
+                if response is not None:
+                    sample.bytes_received = response.content.total_bytes
+                self.metrics.record(family, sample)
+
+        raise UpstreamUnavailable(host, breaker.retry_after if breaker.is_open else None) from last_error
+
+    async def cached(self, endpoint: str, fetch: Callable[[], Awaitable[Any]], key: str | None = None, deadline: Deadline | None = None) -> Any:
+        """
+        Runs `fetch` through the response cache, using the policy of `endpoint` (see `ENDPOINT_CACHE_POLICIES`).
+        `key` identifies the request in the cache (the endpoint itself by default).
+        The caller stops waiting at its `deadline`, but a shared fetch keeps going to fill the cache.
+        """
+        policy = ENDPOINT_CACHE_POLICIES.get(endpoint)
+        if policy is None:
+            cache_hit.set(None)
+            return await fetch()
+        deadline = deadline or Deadline(DEFAULT_DEADLINE_S)
+        try:
+            async with asyncio.timeout(deadline.remaining):
+                return await self.cache.get(key or endpoint, fetch, policy)
+        except TimeoutError:
+            raise UpstreamUnavailable(urlsplit(key or endpoint).hostname or endpoint) from None
+
+    async def get_json(self, endpoint: str, params: dict | None = None, deadline: Deadline | None = None, **url_params) -> Any:
+        """
+        GET request on a JSON endpoint, through the response cache. Requests to
+        `CONDITIONAL_ENDPOINTS` are revalidated with their stored validators.
+        """
+        url = endpoint.format(**url_params)
+        key = request_key(url, params)
+        is_conditional = endpoint in CONDITIONAL_ENDPOINTS
+        async def fetch() -> Any:
+            headers = self.validators.conditional_headers(key) if is_conditional else {}
+            async def handler(resp: aiohttp.ClientResponse) -> Any:
+                if resp.status == 304 and headers:
+                    return self.validators.get(key)
+                resp.raise_for_status()
+                data = json_loads(await read_body(resp))
+                if is_conditional:
+                    self.validators.store(key, resp.headers, data)
+                return data
+            return await self.request("GET", url, handler, deadline, params=params, headers=headers)
+        return await self.cached(endpoint, fetch, key, deadline)
+
+    async def head(self, endpoint: str, headers: dict[str, str] | None = None, deadline: Deadline | None = None) -> Mapping[str, str]:
+        """ HEAD request, through the response cache (returns the response headers) """
+        is_conditional = endpoint in CONDITIONAL_ENDPOINTS
+        async def fetch() -> Mapping[str, str]:
+            conditional_headers = self.validators.conditional_headers(endpoint) if is_conditional else {}
+            async def handler(resp: aiohttp.ClientResponse) -> Mapping[str, str]:
+                if resp.status == 304 and conditional_headers:
+                    return self.validators.get(endpoint)
+                resp.raise_for_status()
+                response_headers = resp.headers.copy() # case-insensitive
+                if is_conditional:
+                    self.validators.store(endpoint, response_headers, response_headers)
+                return response_headers
+            return await self.request("HEAD", endpoint, handler, deadline, headers={**(headers or {}), **conditional_headers})
+        return await self.cached(endpoint, fetch, deadline=deadline)
+
 # ---------------------------------- video system
 class VideoSystemClient:
     @staticmethod
-    async def send_video_to_endpoint(video_url: str) -> int | str:
+    async def send_video_to_endpoint(http_client: HTTPClient, video_url: str) -> int | str:
         payload = {"video_url": video_url}
         headers = {
             "Authorization": f"Bearer {PrivateData.VIDEO_ENDPOINT_TOKEN}",
             "Content-Type": "application/json"
         }
 
+        async def get_status(resp: aiohttp.ClientResponse) -> int:
+            return resp.status
+
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(PrivateData.VIDEO_ENDPOINT_URL, json=payload, headers=headers) as resp:
-                    return resp.status
+            return await http_client.request("POST", PrivateData.VIDEO_ENDPOINT_URL, get_status, json=payload, headers=headers)
         except Exception:
             return "unknown"
 
     @staticmethod
-    async def get_website_featured_video() -> tuple[str | None, datetime.datetime | None]:
+    async def get_website_featured_video(http_client: HTTPClient) -> tuple[str | None, datetime.datetime | None]:
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(PublicAPI.FEATURED_VIDEO) as resp:
-                    data = await resp.json()
-                    video_url = data.get("video_url", None)
-                    updated_str = data.get("updatedAt", None)
-                    updated_at_dt = datetime.datetime.fromisoformat(updated_str) if updated_str else None
-                    return video_url, updated_at_dt
+            data = await http_client.request("GET", PublicAPI.FEATURED_VIDEO, read_json)
+            video_url = data.get("video_url", None)
+            updated_str = data.get("updatedAt", None)
+            updated_at_dt = datetime.datetime.fromisoformat(updated_str) if updated_str else None
+            return video_url, updated_at_dt
         except Exception:
             return None, None
 
+# ---------------------------------- playfab rate limiting
+# https://learn.microsoft.com/en-us/gaming/playfab/features/config/limits (error 1199: APIClientRequestRateLimitExceeded)
+PLAYFAB_RATE_PER_S = 5 # tokens regenerated per second...
+PLAYFAB_BURST = 10 # ...up to this capacity
+PLAYFAB_THROTTLED_ERROR_CODE = 1199
+PLAYFAB_ACCOUNT_NOT_FOUND_ERROR_CODE = 1001
+
+class AccountNotFound(Exception):
+    """ PlayFab answered that the requested account doesn't exist (see `PlayFabClient.call_client_api`) """
+
+class RequestPriority(IntEnum):
+    """ The lower the value, the sooner the request is served """
+    INTERACTIVE = 0 # a user is waiting (commands, buttons)
+    BACKGROUND = 1 # tasks, prefetch, polling
+
+class PriorityRateLimiter():
+    """
+    Token bucket shared by all the PlayFab calls. When the bucket is empty, callers queue
+    and are served by priority (then in arrival order), so user-facing requests overtake background work.
+    """
+    def __init__(self, rate: float = PLAYFAB_RATE_PER_S, burst: int = PLAYFAB_BURST):
+        self._rate = rate
+        self._burst = burst
+        self._tokens: float = burst
+        self._updated_at = time.monotonic()
+        self._paused_until: float = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+        # counters
+        self.acquired: dict[RequestPriority, int] = {priority: 0 for priority in RequestPriority}
+        self.total_wait_s: dict[RequestPriority, float] = {priority: 0.0 for priority in RequestPriority}
+        self.max_wait_s: dict[RequestPriority, float] = {priority: 0.0 for priority in RequestPriority}
+
+    def queue_depth(self, priority: RequestPriority | None = None) -> int:
+        return sum(
+            1 for waiter_priority, _, future in self._waiters
+            if not future.done() and (priority is None or waiter_priority == priority)
+        )
+
+    def average_wait_s(self, priority: RequestPriority) -> float:
+        return self.total_wait_s[priority] / max(1, self.acquired[priority])
+
+    def pause(self, seconds: float) -> None:
+        """ Stops handing out tokens for a while (e.g. when PlayFab reports throttling anyway) """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0
+
+    async def acquire(self, priority: RequestPriority = RequestPriority.INTERACTIVE) -> None:
+        started_at = time.monotonic()
+        self._refill()
+        if not self.queue_depth() and self._tokens >= 1:
+            self._tokens -= 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._counter), future))
+            if self._dispatcher is None or self._dispatcher.done():
+                self._dispatcher = asyncio.create_task(self._dispatch())
+            await future # a cancelled waiter is skipped by the dispatcher
+
+        waited = time.monotonic() - started_at
+        self.acquired[priority] += 1
+        self.total_wait_s[priority] += waited
+        self.max_wait_s[priority] = max(self.max_wait_s[priority], waited)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if now >= self._paused_until:
+            elapsed = now - max(self._updated_at, self._paused_until)
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+        self._updated_at = now
+
+    async def _dispatch(self) -> None:
+        while self._waiters:
+            self._refill()
+            if self._tokens < 1:
+                wait = max(self._paused_until - time.monotonic(), 0) + (1 - self._tokens) / self._rate
+                await asyncio.sleep(wait)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done(): # cancelled
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
 # ---------------------------------- playfab connexion
+PLAYFAB_SESSION_LIFETIME_MN = 40 # 45mn with a margin of 5mn
+PLAYFAB_LOGIN_TIMEOUT_S = 5
+PLAYFAB_REFRESH_MARGIN_S = 5 * 60 # the ticket is renewed in the background this long before it expires
+PLAYFAB_RETRY_DELAY_S = 30 # doubled after each failed login...
+PLAYFAB_MAX_RETRY_DELAY_S = 10 * 60 # ...up to this limit
+
 class PlayFabClient():
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: commands.Bot, http_client: HTTPClient, player_storage: "PlayerStorage | None" = None):
         self._bot = bot
+        self._http = http_client
+        self.player_storage = player_storage # persistent PlayFabId -> name resolutions
         self._playfab_id: str | None = None
         self._session_token: str | None = None
         self._token_expiration: datetime.datetime | None = None
+        # single-flight login shared by all concurrent callers + background refresher
+        self._logins = SingleFlight()
+        self._refresh_task: asyncio.Task | None = None
+        self.rate_limiter = PriorityRateLimiter()
+
+    @property
+    def http_client(self) -> HTTPClient:
+        return self._http
+
+    def start(self) -> None:
+        """ Starts the background task keeping the session ticket fresh """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = None
+        self._logins.cancel()
 
     async def _handle_api_error(self, error: dict, api: str) -> None:
-        if error["errorCode"] != 1001: # AccountNotFound
+        if error.get("errorCode") == PLAYFAB_THROTTLED_ERROR_CODE:
+            self.rate_limiter.pause(float(error.get("retryAfterSeconds") or 1))
+        if error["errorCode"] != PLAYFAB_ACCOUNT_NOT_FOUND_ERROR_CODE:
             await log(
                 bot=self._bot, type=BOTLOG, color=LogColor.RED,
                 title=f"{DefaultEmojis.ERROR} An error occurred while attempting to connect to PlayFab.",
@@ -106,22 +772,24 @@ class PlayFabClient():
             "Username": PrivateData.PLAYFAB_USERNAME
         }
 
+        # a renewal of a still valid ticket is routine, only (re)connections are logged
+        was_connected = self._is_token_valid()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(PlayFabAPI.LOGIN, json=payload, timeout=5) as resp:
-                    data = await resp.json()
-                    if data["code"] != 200:
-                        await self._handle_api_error(data, PlayFabAPI.LOGIN)
-                        return False
-                    self._playfab_id = data["data"]["PlayFabId"]
-                    self._session_token = data["data"]["SessionTicket"]
-                    self._token_expiration = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=40) # 45mn with a margin of 5mn
-                    await log(
-                        bot=self._bot, type=BOTLOG, color=LogColor.GREEN,
-                        title="🌐 PlayFab login successful",
-                        msg="The bot successfully logged into the PlayFab service"
-                    )
-                    return True
+            await self.rate_limiter.acquire(RequestPriority.INTERACTIVE) # everyone is waiting for it
+            data = await self._http.request("POST", PlayFabAPI.LOGIN, read_json, Deadline(PLAYFAB_LOGIN_TIMEOUT_S), json=payload)
+            if data["code"] != 200:
+                await self._handle_api_error(data, PlayFabAPI.LOGIN)
+                return False
+            self._playfab_id = data["data"]["PlayFabId"]
+            self._session_token = data["data"]["SessionTicket"]
+            self._token_expiration = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(minutes=PLAYFAB_SESSION_LIFETIME_MN)
+            if not was_connected:
+                await log(
+                    bot=self._bot, type=BOTLOG, color=LogColor.GREEN,
+                    title="🌐 PlayFab login successful",
+                    msg="The bot successfully logged into the PlayFab service"
+                )
+            return True
         except Exception:
             await log(
                 bot=self._bot, type=BOTLOG, color=LogColor.RED,
@@ -130,29 +798,70 @@ class PlayFabClient():
             )
             return False
 
+    async def _shared_login(self) -> bool:
+        """
+        Single-flight login: if a login is already in progress, wait for its result instead of starting another one
+        """
+        return await self._logins.run("login", self._login)
+
+    async def _ensure_session(self) -> bool:
+        if self._is_token_valid():
+            return True
+        return await self._shared_login()
+
+    async def _refresh_loop(self) -> None:
+        """
+        Renews the session ticket before `_token_expiration`, so that interactive requests never have to log in
+        """
+        retry_delay = PLAYFAB_RETRY_DELAY_S
+        while True:
+            if self._token_expiration:
+                remaining = (self._token_expiration - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+                await asyncio.sleep(max(0, remaining - PLAYFAB_REFRESH_MARGIN_S))
+            try:
+                is_logged_in = await self._shared_login()
+            except Exception:
+                is_logged_in = False
+
+            if is_logged_in:
+                retry_delay = PLAYFAB_RETRY_DELAY_S
+            else:
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, PLAYFAB_MAX_RETRY_DELAY_S)
+
     # ---------------------------------- public methods
-    async def call_client_api(self, url: str, body: dict = {}) -> dict | None:
-        if not self._is_token_valid():
-            if not await self._login():
-                return None
+    async def call_client_api(
+            self, url: str, body: dict = {}, deadline: Deadline | None = None,
+            priority: RequestPriority = RequestPriority.INTERACTIVE, raise_not_found: bool = False
+        ) -> dict | None:
+        """
+        Returns the answer of PlayFab, `None` if the call failed.
+        With `raise_not_found`, `AccountNotFound` is raised if PlayFab answers that the account doesn't exist.
+        """
+        if not await self._ensure_session():
+            return None
 
         headers = {
             "X-Authorization": self._session_token,
             "Content-Type": "application/json",
         }
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=body, headers=headers) as resp:
-                    data = await resp.json()
-                    if data["code"] != 200:
-                        await self._handle_api_error(data, url)
-                        return None
-                    return data
+            deadline = deadline or Deadline(DEFAULT_DEADLINE_S)
+            async with asyncio.timeout(deadline.remaining):
+                await self.rate_limiter.acquire(priority)
+            data = await self._http.request("POST", url, read_json, deadline, json=body, headers=headers)
+            if data["code"] != 200:
+                await self._handle_api_error(data, url)
+                if raise_not_found and data.get("errorCode") == PLAYFAB_ACCOUNT_NOT_FOUND_ERROR_CODE:
+                    raise AccountNotFound(data.get("errorMessage") or "User not found")
+                return None
+            return data
+        except AccountNotFound:
+            raise
         except Exception:
             return None
         
     async def get_token(self) -> str | None:
-        if not self._is_token_valid():
-            if not await self._login():
-                return None
+        if not await self._ensure_session():
+            return None
         return self._session_token
\ No newline at end of file
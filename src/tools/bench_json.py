@@ -0,0 +1,106 @@
+"""
+Decoding benchmark of the JSON backends over the payload corpus of `data/payloads`
+(CloudScript profiles, server list and CCU, in the shape served by the upstreams).
+CloudScript payloads are decoded like `fetch_player` does: the body, then the JSON-in-JSON blobs.
+They are then decoded into `PlayerProfile` objects (`decode_profile`, with the backend in use),
+to measure the decoding time and the memory taken by each profile: for the statistics only (what
+`/player_info` shows first), then with the sections decoded on demand (loadout, moderation notes).
+
+Run it from the src folder:
+    uv run -m tools.bench_json [--repeat 2000]
+"""
+
+import argparse
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+from tools.json_codec import (
+    JSON_BACKEND,
+    loads as json_loads,
+    loads_stdlib
+)
+
+from tools.stats_parser import (
+    PlayerProfile,
+    decode_profile,
+    decode_mod_entry
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PAYLOADS_DIR = Path(__file__).resolve().parent.parent / "data" / "payloads"
+NESTED_BLOBS = (("UserReadOnlyData", "mod_notes"), ("UserReadOnlyData", "Properties"), ("UserData", "Loadout"))
+
+def decode_payload(loads: Callable[[bytes | str], Any], raw: bytes) -> Any:
+    data = loads(raw)
+    result = data.get("data", {}).get("FunctionResult") if isinstance(data, dict) else None
+    if isinstance(result, dict):
+        for section, key in NESTED_BLOBS:
+            loads(result.get(section, {}).get(key, {}).get("Value") or "null")
+    return data
+
+def decode_player(raw: bytes, all_sections: bool = False) -> PlayerProfile:
+    """
+    Decodes a CloudScript payload like `load_player`; with `all_sections`, the lazy sections are decoded too,
+    like `load_mod_history` and `load_color_theme` do but without their requests (moderators are left unresolved)
+    """
+    player = decode_profile(PlayerProfile(), json_loads(raw)["data"]["FunctionResult"])
+    if all_sections:
+        player.mod_history = [decode_mod_entry(entry, {}) for entry in player.mod_notes]
+        player._decode_loadout()
+    return player
+
+def profile_memory(raw: bytes, all_sections: bool, count: int = 1000) -> float:
+    """ Average memory (in bytes) allocated for each decoded profile kept alive """
+    tracemalloc.start()
+    players = [decode_player(raw, all_sections) for _ in range(count)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del players
+    return allocated / count
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Decoding benchmark of the JSON backends")
+    parser.add_argument("--repeat", type=int, default=2000, help="decodes per payload and backend")
+    parser.add_argument("--payloads", type=Path, default=PAYLOADS_DIR)
+    args = parser.parse_args()
+
+    backends: dict[str, Callable[[bytes | str], Any]] = {"json": loads_stdlib}
+    if orjson is not None:
+        backends["orjson"] = orjson.loads
+    else:
+        print("orjson is not installed, only the standard library is measured")
+
+    corpus = {path.name: path.read_bytes() for path in sorted(args.payloads.glob("*.json"))}
+    if not corpus:
+        raise SystemExit(f"no payload found in {args.payloads}")
+
+    print(f"{'payload':<40}{'size':>9}" + ''.join(f"{name + ' (µs)':>15}" for name in backends))
+    totals = dict.fromkeys(backends, 0.0)
+    for name, raw in corpus.items():
+        expected = decode_payload(loads_stdlib, raw)
+        row = f"{name:<40}{len(raw):>8}B"
+        for backend, loads in backends.items():
+            assert decode_payload(loads, raw) == expected, f"{backend} decodes {name} differently"
+            elapsed = timeit.timeit(lambda loads=loads, raw=raw: decode_payload(loads, raw), number=args.repeat) / args.repeat
+            totals[backend] += elapsed
+            row += f"{elapsed * 1e6:>15.1f}"
+        print(row)
+    print(f"{'total':<49}" + ''.join(f"{total * 1e6:>15.1f}" for total in totals.values()))
+    if "orjson" in totals:
+        print(f"orjson speedup: x{totals['json'] / totals['orjson']:.2f}")
+
+    profiles = {name: raw for name, raw in corpus.items() if name.startswith("cloudscript_")}
+    for all_sections in (False, True):
+        print(f"\n{'profile (' + JSON_BACKEND + (', all sections' if all_sections else ', statistics') + ')':<40}{'decode (µs)':>15}{'memory (B)':>15}")
+        for name, raw in profiles.items():
+            elapsed = timeit.timeit(lambda raw=raw, all_sections=all_sections: decode_player(raw, all_sections), number=args.repeat) / args.repeat
+            print(f"{name:<40}{elapsed * 1e6:>15.1f}{profile_memory(raw, all_sections):>15.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Rendering of the player color-theme thumbnails (primary/secondary color triangles shown by `/player_info`).
+There are only a few hundred distinct color pairs: each PNG is rendered once, off the event loop, then served
+from a bounded memory cache backed by files in `CACHE_DIR`.
+"""
+
+import asyncio
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from PIL import (
+    Image,
+    ImageDraw
+)
+
+# bot files
+from data.constants import CACHE_DIR
+from tools.api_client import SingleFlight
+
+COLOR_THEME_SIZE = 60 # px
+COLOR_THEME_MEMORY_CACHE_SIZE = 512 # PNGs kept in memory (~200 bytes each)
+COLOR_THEME_CACHE_DIR = CACHE_DIR / "color_themes"
+COLOR_THEME_RENDER_THREADS = 2 # not the default executor, which also resolves the DNS of aiohttp
+
+def render_color_theme(primary_color: str, secondary_color: str) -> bytes:
+    """ Returns the PNG of the color theme (blocking, raises a `ValueError` if a color is invalid) """
+    buffer = BytesIO()
+    image = Image.new("RGB", (COLOR_THEME_SIZE, COLOR_THEME_SIZE), color=secondary_color)
+    draw = ImageDraw.Draw(image)
+    draw.polygon(((0, 0), (0, COLOR_THEME_SIZE), (COLOR_THEME_SIZE, 0)), fill=primary_color)
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+class ColorThemeRenderer():
+    def __init__(self, cache_dir: Path = COLOR_THEME_CACHE_DIR, max_size: int = COLOR_THEME_MEMORY_CACHE_SIZE):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._images: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._renders = SingleFlight()
+        self._executor = ThreadPoolExecutor(max_workers=COLOR_THEME_RENDER_THREADS, thread_name_prefix="color-theme")
+
+    def _path(self, key: tuple[str, str]) -> Path:
+        # colors come from the player data: the file name is derived from them, never made of them
+        return self._cache_dir / f"{hashlib.sha256('|'.join(key).encode()).hexdigest()[:32]}.png"
+
+    def _load_or_render(self, key: tuple[str, str]) -> bytes:
+        """ Runs in the thread pool """
+        path = self._path(key)
+        try:
+            return path.read_bytes()
+        except OSError:
+            pass
+        image = render_color_theme(*key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(image)
+        except OSError:
+            pass # the disk cache is only an optimization
+        return image
+
+    async def get(self, primary_color: str, secondary_color: str) -> bytes | None:
+        """ Returns the PNG of this color theme (`None` if a color is invalid) """
+        key = (primary_color.lower(), secondary_color.lower())
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            return image
+
+        try:
+            return await self._renders.run(key, lambda: self._render(key))
+        except ValueError:
+            return None
+
+    def close(self) -> None:
+        """ Stops the rendering threads (the renders that haven't started are dropped) """
+        self._renders.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _render(self, key: tuple[str, str]) -> bytes:
+        image = await asyncio.get_running_loop().run_in_executor(self._executor, self._load_or_render, key)
+        self._images[key] = image
+        self._images.move_to_end(key)
+        while len(self._images) > self._max_size:
+            self._images.popitem(last=False)
+        return image
+
+color_themes = ColorThemeRenderer()
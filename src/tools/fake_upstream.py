@@ -0,0 +1,288 @@
+"""
+Local stand-in for every upstream service used by the bot (PlayFab, CCU, regions, server lists,
+region pings, build files, wiki, YouTube and the video system), to develop, load-test or benchmark offline.
+
+Usage (from `src`):
+```sh
+uv run -m tools.fake_upstream --port 8080 --latency-ms 80 --error-rate 0.05
+```
+then set `UPSTREAM_BASE_URL=http://127.0.0.1:8080` in the `.env` file: every request of `HTTPClient`
+is rewritten to `UPSTREAM_BASE_URL/<original host>/<original path>` (see `tools.api_client.upstream_url`).
+
+:copyright: (c) 2026-present pandaroux007
+:license: MIT, see LICENSE.txt for details.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from aiohttp import web
+from dataclasses import dataclass
+from datetime import (
+    datetime,
+    timedelta,
+    timezone
+)
+
+from email.utils import format_datetime
+# bot files
+from tools.api_client import (
+    PublicAPI,
+    PlayFabAPI
+)
+
+REGIONS = ["eu", "na", "sa", "as", "oc"]
+PLAYLISTS = ["wf", "hc", "ws", "cm"]
+MAPS = ["Sandstorm", "Outpost", "Harbor", "Frostbite", "Canyon"]
+MODES = ["Team Deathmatch", "Capture The Flag", "Free For All", "King Of The Hill"]
+WEAPONS = ["crifle", "arifle", "brifle", "pBlaster", "pRocket", "mechProj", "dBarrel", "smg", "lmg", "sniper"]
+ACHIEVEMENTS = [
+    "kills", "deaths", "games", "wins", "flags", "skulls", "winstreak", "vehKills", "headshot", "assist",
+    "kchain_x2", "kchain_x3", "kchain_x4", "kchain_x5", "kchain_x6", "kchain_x7",
+    "killStreak_x4", "killStreak_x6", "killStreak_x8", "killStreak_x10"
+]
+MODERATOR_IDS = ["MOD0000000000001", "MOD0000000000002", "MOD0000000000003"]
+UNKNOWN_PLAYER_PREFIX = "unknown" # names starting with it do not exist (AccountNotFound)
+BUILD_DATE = datetime(2026, 1, 15, 18, 30, tzinfo=timezone.utc)
+
+@dataclass
+class FakeUpstreamConfig:
+    latency_ms: float = 0 # added to every response...
+    jitter_ms: float = 0 # ...plus a random part up to this value
+    error_rate: float = 0 # fraction of requests answered with a 503
+    games_per_region: int = 30
+    mod_notes: int = 3 # per flagged player
+    search_results: int = 5 # wiki and YouTube
+    padding_bytes: int = 0 # extra bytes added to every JSON payload
+
+def _seeded(key: str) -> random.Random:
+    """ Same input, same fixtures: responses are realistic but reproducible """
+    return random.Random(int(hashlib.sha256(key.encode()).hexdigest()[:16], 16))
+
+def _playfab_error(code: int, error: str, error_code: int, message: str) -> web.Response:
+    return web.json_response(status=code, data={
+        "code": code, "status": error, "error": error, "errorCode": error_code, "errorMessage": message
+    })
+
+class FakeUpstream():
+    def __init__(self, config: FakeUpstreamConfig):
+        self.config = config
+
+    def make_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._chaos_middleware])
+        app.router.add_route('*', "/{host}/{path:.*}", self._dispatch)
+        return app
+
+    # ---------------------------------- helpers
+    @web.middleware
+    async def _chaos_middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        delay_ms = self.config.latency_ms + random.uniform(0, self.config.jitter_ms)
+        if delay_ms:
+            await asyncio.sleep(delay_ms / 1000)
+        if random.random() < self.config.error_rate:
+            return web.json_response(status=503, data={"code": 503, "status": "ServiceUnavailable", "errorCode": 0})
+        return await handler(request)
+
+    def _json(self, data: dict, headers: dict[str, str] | None = None) -> web.Response:
+        if self.config.padding_bytes:
+            data = {**data, "_padding": 'x' * self.config.padding_bytes}
+        return web.json_response(data, headers=headers)
+
+    def _conditional(self, request: web.Request, etag: str, last_modified: datetime, make_response) -> web.StreamResponse:
+        """ Answers 304 when the client validators still match """
+        validators = {"ETag": etag, "Last-Modified": format_datetime(last_modified, usegmt=True)}
+        if request.headers.get("If-None-Match") == etag or request.headers.get("If-Modified-Since") == validators["Last-Modified"]:
+            return web.Response(status=304, headers=validators)
+        return make_response(validators)
+
+    async def _dispatch(self, request: web.Request) -> web.StreamResponse:
+        host = request.match_info["host"]
+        path = '/' + request.match_info["path"]
+        url = f"https://{host}{path}"
+
+        if host.endswith(".playfabapi.com"):
+            return await self._playfab(request, path)
+        if url == PublicAPI.CCU:
+            return self._ccu()
+        if url == PublicAPI.REGIONS:
+            return self._conditional(request, '"regions-v1"', BUILD_DATE, lambda headers: self._json(
+                {"regionList": [{"region": region} for region in REGIONS]}, headers
+            ))
+        if url in (PublicAPI.BUILD, PublicAPI.BETA_BUILD):
+            build_date = BUILD_DATE if url == PublicAPI.BUILD else BUILD_DATE + timedelta(days=3)
+            return self._conditional(request, f'"{build_date.timestamp():.0f}"', build_date, lambda headers: self._json({}, headers))
+        if url == PublicAPI.FEATURED_VIDEO:
+            return self._json({"video_url": "https://youtu.be/dQw4w9WgXcQ", "updatedAt": BUILD_DATE.isoformat()})
+        if host.startswith("rep.") and path == "/ping":
+            return self._json({"status": "ok"})
+        if host.startswith("rep.") and path == "/serverList":
+            return self._server_list(host.split('.')[1])
+        if path == "/api.php":
+            return self._wiki(request)
+        if host == "www.googleapis.com":
+            return self._youtube()
+        if request.method == "POST": # video system endpoint (private url)
+            return web.json_response({"success": True})
+        raise web.HTTPNotFound()
+
+    # ---------------------------------- public api
+    def _ccu(self) -> web.Response:
+        rng = random.Random()
+        per_region = {region: {playlist: rng.randint(0, 300) for playlist in PLAYLISTS} for region in REGIONS}
+        global_ccu = {playlist: sum(region[playlist] for region in per_region.values()) for playlist in PLAYLISTS}
+        return self._json({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "global": global_ccu,
+            "perRegion": per_region
+        })
+
+    def _server_list(self, region: str) -> web.Response:
+        rng = random.Random()
+        games = []
+        for index in range(self.config.games_per_region):
+            max_players = rng.choice([8, 12, 16])
+            games.append({
+                "gameId": f"{region.upper()}-{index:04d}",
+                "gameMap": rng.choice(MAPS),
+                "gameMode": rng.choice(MODES),
+                "playerCount": rng.randint(0, max_players),
+                "maxPlayers": max_players,
+                "webPort": str(10000 + index),
+                "playlist": rng.choice(PLAYLISTS)
+            })
+        return self._json({"serverList": games})
+
+    def _wiki(self, request: web.Request) -> web.Response:
+        query = request.query.get("srsearch", '')
+        rng = _seeded(query)
+        return self._conditional(
+            request, f'"wiki-{hashlib.md5(query.encode()).hexdigest()}"', BUILD_DATE,
+            lambda headers: self._json({"query": {"search": [
+                {
+                    "title": f"{query.title()} ({index + 1})",
+                    "pageid": rng.randint(1, 99999),
+                    "wordcount": rng.randint(50, 5000),
+                    "timestamp": (BUILD_DATE - timedelta(days=rng.randint(0, 400))).isoformat()
+                }
+                for index in range(self.config.search_results)
+            ]}}, headers)
+        )
+
+    def _youtube(self) -> web.Response:
+        rng = random.Random()
+        return self._json({"items": [
+            {"id": {"videoId": ''.join(rng.choices("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_", k=11))}}
+            for _ in range(self.config.search_results)
+        ]})
+
+    # ---------------------------------- playfab
+    async def _playfab(self, request: web.Request, path: str) -> web.Response:
+        body: dict = await request.json() if request.can_read_body else {}
+        url = f"{PlayFabAPI.BASE_URL}{path.removeprefix('/Client')}"
+
+        if url == PlayFabAPI.LOGIN:
+            return web.json_response({"code": 200, "status": "OK", "data": {
+                "PlayFabId": "BOT0000000000000", "SessionTicket": f"fake-ticket-{random.getrandbits(64):x}"
+            }})
+        if not request.headers.get("X-Authorization"):
+            return _playfab_error(401, "NotAuthenticated", 1074, "This API method requires authentication")
+        if url == PlayFabAPI.GET_GAME_VERSION:
+            return web.json_response({"code": 200, "status": "OK", "data": {"Data": {
+                "GameInfo": json.dumps({"GameVersion": "v2.8.1"})
+            }}})
+        if url == PlayFabAPI.SEARCH_PLAYER:
+            return self._account_info(body)
+        if url == PlayFabAPI.GET_PLAYER_DATA:
+            return self._remote_profile(str(dict(body.get("FunctionParameter") or {}).get("remoteId", '')))
+        return _playfab_error(404, "NotFound", 1123, "API not found")
+
+    def _account_info(self, body: dict) -> web.Response:
+        if body.get("PlayFabId"):
+            playfab_id = str(body["PlayFabId"])
+            name = f"Moderator{MODERATOR_IDS.index(playfab_id) + 1}" if playfab_id in MODERATOR_IDS else f"Player_{playfab_id[-4:]}"
+        else:
+            name = str(body.get("TitleDisplayName") or body.get("Username") or '')
+            if not name or name.lower().startswith(UNKNOWN_PLAYER_PREFIX):
+                return _playfab_error(400, "AccountNotFound", 1001, "User not found")
+            playfab_id = hashlib.sha1(name.lower().encode()).hexdigest()[:16].upper()
+
+        created = BUILD_DATE - timedelta(days=_seeded(playfab_id).randint(1, 2000))
+        return web.json_response({"code": 200, "status": "OK", "data": {"AccountInfo": {
+            "PlayFabId": playfab_id,
+            "Created": created.isoformat(),
+            "Username": name.lower(),
+            "TitleInfo": {"DisplayName": name}
+        }}})
+
+    def _remote_profile(self, playfab_id: str) -> web.Response:
+        rng = _seeded(playfab_id)
+        games = rng.randint(10, 5000)
+        properties = {
+            "Level": rng.randint(1, 100),
+            "Experience": rng.randint(0, 1000000),
+            "isAdmin": rng.random() < 0.02,
+            "verificationProperties": f"<color=#{rng.randint(0, 0xFFFFFF):06x}>[ {rng.choice(['ACE', 'RWNC', 'PRO'])} ]</color>" if rng.random() < 0.3 else None,
+            "achievementProgressions": [
+                {"Id": achievement, "count": games if achievement == "games" else rng.randint(0, games * 10)}
+                for achievement in ACHIEVEMENTS
+            ],
+            "killStats": [{"Id": weapon, "count": rng.randint(0, games * 5)} for weapon in WEAPONS]
+        }
+        mod_notes = [
+            {
+                "ts": int((BUILD_DATE - timedelta(days=rng.randint(0, 300))).timestamp() * 1000),
+                "by": rng.choice(MODERATOR_IDS),
+                "msg": f"{rng.choice(['Warning', 'Ban', 'Mute'])}: {rng.choice(['toxic chat', 'teaming', 'suspected aimbot'])}"
+            }
+            for _ in range(self.config.mod_notes if rng.random() < 0.2 else 0)
+        ]
+        loadout = {
+            "avatarMods": rng.sample(["mod_jetpack", "mod_visor", "mod_cape", "none", "mod_horns"], k=2),
+            "color_pri": f"{rng.randint(0, 0xFFFFFF):06x}",
+            "color_sec": f"{rng.randint(0, 0xFFFFFF):06x}"
+        }
+        # like GetUserData, the DataVersion is the one of the whole container, each record has its own LastUpdated
+        last_updated = (BUILD_DATE - timedelta(days=rng.randint(0, 300))).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        return self._json({"code": 200, "status": "OK", "data": {"FunctionResult": {
+            "DisplayName": f"Player_{playfab_id[-4:]}",
+            "UserReadOnlyData": {
+                "mod_notes": {"Value": json.dumps(mod_notes), "LastUpdated": last_updated, "Permission": "Private"},
+                "Properties": {"Value": json.dumps(properties), "LastUpdated": last_updated, "Permission": "Private"},
+                "DataVersion": rng.randint(1, 500)
+            },
+            "UserData": {
+                "Loadout": {"Value": json.dumps(loadout), "LastUpdated": last_updated, "Permission": "Public"},
+                "DataVersion": rng.randint(1, 500)
+            }
+        }}})
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the upstream services of RepulsBot")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--games-per-region", type=int, default=30)
+    parser.add_argument("--mod-notes", type=int, default=3)
+    parser.add_argument("--search-results", type=int, default=5)
+    parser.add_argument("--padding-bytes", type=int, default=0)
+    args = parser.parse_args()
+
+    config = FakeUpstreamConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        games_per_region=args.games_per_region,
+        mod_notes=args.mod_notes,
+        search_results=args.search_results,
+        padding_bytes=args.padding_bytes
+    )
+    print(f"Fake upstream listening on http://{args.host}:{args.port} (set UPSTREAM_BASE_URL to this address)")
+    web.run_app(FakeUpstream(config).make_app(), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
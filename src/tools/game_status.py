@@ -0,0 +1,145 @@
+"""
+Snapshot of the game status (version, build dates, CCU, region servers) kept up to date in background,
+so that `/game_status` is rendered from memory whatever the number of users and the latency of the game services.
+
+:copyright: (c) 2026-present pandaroux007
+:license: MIT, see LICENSE.txt for details.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import (
+    datetime,
+    timezone
+)
+from typing import (
+    Any,
+    Optional
+)
+# bot files
+from tools.typing import (
+    GameRegion,
+    regions_status
+)
+from tools.api_client import (
+    PublicAPI,
+    PlayFabAPI,
+    PlayFabClient,
+    HTTPClient,
+    Deadline,
+    RequestPriority
+)
+
+from tools.stats_parser import (
+    fetch_build_date,
+    fetch_server_stats,
+    fetch_game_version
+)
+
+GAME_STATUS_REFRESH_S = 30 # the CCU endpoint itself is updated about every minute
+GAME_STATUS_FETCH_DEADLINE_S = 8 # given to each fetch of a refresh (they run concurrently)
+GAME_STATUS_FIRST_RENDER_S = 1.5 # before the first snapshot, what arrived by then is shown, the rest is filled in later
+GAME_STATUS_RETRY_S = 5 # delay before a new attempt when a refresh failed completely
+
+@dataclass
+class GameStatusSnapshot:
+    taken_at: datetime
+    game_version: Optional[str]
+    latest_game_update: Optional[datetime]
+    latest_beta_update: Optional[datetime]
+    server_stats: Optional[tuple[datetime, list[GameRegion], GameRegion]] # see `fetch_server_stats`
+    stale_since: Optional[datetime] = None # the game services are down, the data is the last known one
+    pending: frozenset[str] = frozenset() # sections (fields above) still being fetched, only before the first complete snapshot
+
+class GameStatusService():
+    """
+    Refreshes a `GameStatusSnapshot` every `GAME_STATUS_REFRESH_S` seconds (background priority),
+    the commands only read the last one (see `get`). The sections of a snapshot are fetched concurrently,
+    each with its own deadline, so a refresh takes as long as the slowest service (not the sum of all).
+    Nobody waits for a refresh: a slow service is awaited until the deadline, not replaced by its last known good payload.
+    """
+    def __init__(self, http_client: HTTPClient, playfab_connection: PlayFabClient, interval: float = GAME_STATUS_REFRESH_S):
+        self._http = http_client
+        self._playfab = playfab_connection
+        self._interval = interval
+        self.snapshot: Optional[GameStatusSnapshot] = None
+        self._first_snapshot = asyncio.Event()
+        self._refresh_task: asyncio.Task | None = None
+        self._sections: dict[str, asyncio.Task] = {} # fetches of the refresh in progress (or of the last one)
+
+    def start(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = None
+
+    async def get(self, deadline: Optional[Deadline] = None) -> Optional[GameStatusSnapshot]:
+        """
+        Returns the last snapshot. Right after startup, the first one is awaited until `deadline`:
+        if it isn't complete by then, a partial snapshot is returned (see `GameStatusSnapshot.pending`),
+        or `None` if no refresh was started.
+        """
+        if self.snapshot is None:
+            try:
+                async with asyncio.timeout(deadline.remaining if deadline else None):
+                    await self._first_snapshot.wait()
+            except TimeoutError:
+                return self._build_snapshot() if self._sections else None
+        return self.snapshot
+
+    async def refresh(self) -> GameStatusSnapshot:
+        self._sections = {
+            "game_version": asyncio.create_task(
+                fetch_game_version(self._playfab, Deadline(GAME_STATUS_FETCH_DEADLINE_S), RequestPriority.BACKGROUND)
+            ),
+            "server_stats": asyncio.create_task(self._fetch_server_stats()),
+            "latest_game_update": asyncio.create_task(
+                fetch_build_date(self._http, PublicAPI.BUILD, Deadline(GAME_STATUS_FETCH_DEADLINE_S), RequestPriority.BACKGROUND)
+            ),
+            "latest_beta_update": asyncio.create_task(
+                fetch_build_date(self._http, PublicAPI.BETA_BUILD, Deadline(GAME_STATUS_FETCH_DEADLINE_S), RequestPriority.BACKGROUND)
+            )
+        }
+        await asyncio.gather(*self._sections.values(), return_exceptions=True)
+
+        snapshot = self._build_snapshot()
+        self.snapshot = snapshot
+        self._first_snapshot.set()
+        return snapshot
+
+    async def _fetch_server_stats(self) -> Optional[tuple[datetime, list[GameRegion], GameRegion]]:
+        server_stats = await fetch_server_stats(self._http, Deadline(GAME_STATUS_FETCH_DEADLINE_S), RequestPriority.BACKGROUND)
+        if server_stats is not None:
+            await regions_status(self._http, server_stats[1]) # kept by the regions, the views don't ping again
+        return server_stats
+
+    def _build_snapshot(self) -> GameStatusSnapshot:
+        """ Snapshot of the sections fetched so far by the current refresh (the others are pending) """
+        results: dict[str, Any] = {
+            section: task.result() for section, task in self._sections.items()
+            if task.done() and not task.cancelled() and task.exception() is None
+        }
+        return GameStatusSnapshot(
+            taken_at=datetime.now(timezone.utc),
+            game_version=results.get("game_version"),
+            latest_game_update=results.get("latest_game_update"),
+            latest_beta_update=results.get("latest_beta_update"),
+            server_stats=results.get("server_stats"),
+            stale_since=(
+                self._http.last_known_good.stale_since(PublicAPI.CCU, PlayFabAPI.GET_GAME_VERSION, PublicAPI.BUILD, PublicAPI.BETA_BUILD)
+                if self._http.last_known_good else None
+            ),
+            pending=frozenset(section for section, task in self._sections.items() if not task.done())
+        )
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                snapshot = await self.refresh()
+                failed = snapshot.server_stats is None and snapshot.game_version is None
+            except Exception:
+                failed = True
+            await asyncio.sleep(GAME_STATUS_RETRY_S if failed else self._interval)
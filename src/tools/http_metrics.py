@@ -0,0 +1,115 @@
+"""
+Rolling-window instrumentation of the upstream requests made by `HTTPClient`
+(latency percentiles, status codes, bytes received, connection reuse, timeouts and rejected/truncated bodies).
+- https://docs.aiohttp.org/en/stable/tracing_reference.html
+"""
+
+import aiohttp
+import math
+import time
+from collections import (
+    Counter,
+    deque
+)
+
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+METRICS_WINDOW_S = 15 * 60 # samples older than this are forgotten...
+METRICS_MAX_SAMPLES = 1000 # ...and each endpoint family keeps at most this many
+
+@dataclass(slots=True)
+class RequestSample:
+    """ One attempt of one request (filled progressively, then recorded) """
+    started_at: float = 0.0 # monotonic
+    latency_s: float = 0.0
+    status: int | None = None # None if no response was received
+    bytes_received: int = 0
+    reused_connection: bool | None = None # None if unknown (no connection obtained)
+    timed_out: bool = False
+    body_rejected: bool = False # larger than the ceiling of the endpoint
+    body_truncated: bool = False # connection lost before the end of the body
+
+@dataclass
+class FamilyStats:
+    requests: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    status_codes: Counter
+    bytes_received: int
+    reuse_ratio: float | None
+    timeouts: int
+    rejected_bodies: int
+    truncated_bodies: int
+
+def percentile(sorted_values: list[float], rank: float) -> float:
+    """ Nearest-rank percentile of an already sorted list """
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(rank / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+class HTTPMetrics():
+    def __init__(self, window_s: float = METRICS_WINDOW_S, max_samples: int = METRICS_MAX_SAMPLES):
+        self._window_s = window_s
+        self._max_samples = max_samples
+        self._samples: dict[str, deque[RequestSample]] = {}
+
+    def record(self, family: str, sample: RequestSample) -> None:
+        samples = self._samples.setdefault(family, deque(maxlen=self._max_samples))
+        samples.append(sample)
+        self._prune(samples)
+
+    def _prune(self, samples: deque[RequestSample]) -> None:
+        oldest_allowed = time.monotonic() - self._window_s
+        while samples and samples[0].started_at < oldest_allowed:
+            samples.popleft()
+
+    def latency_percentile(self, family: str, rank: float) -> float | None:
+        """ Recent latency percentile of `family`, in seconds (`None` if nothing was measured) """
+        samples = self._samples.get(family)
+        if samples:
+            self._prune(samples)
+        if not samples:
+            return None
+        return percentile(sorted(sample.latency_s for sample in samples), rank)
+
+    def stats(self) -> dict[str, FamilyStats]:
+        result: dict[str, FamilyStats] = {}
+        for family, samples in sorted(self._samples.items()):
+            self._prune(samples)
+            if not samples:
+                continue
+            latencies = sorted(sample.latency_s * 1000 for sample in samples)
+            reuse_known = [sample.reused_connection for sample in samples if sample.reused_connection is not None]
+            result[family] = FamilyStats(
+                requests=len(samples),
+                p50_ms=percentile(latencies, 50),
+                p95_ms=percentile(latencies, 95),
+                p99_ms=percentile(latencies, 99),
+                status_codes=Counter(sample.status or "none" for sample in samples),
+                bytes_received=sum(sample.bytes_received for sample in samples),
+                reuse_ratio=(sum(reuse_known) / len(reuse_known)) if reuse_known else None,
+                timeouts=sum(sample.timed_out for sample in samples),
+                rejected_bodies=sum(sample.body_rejected for sample in samples),
+                truncated_bodies=sum(sample.body_truncated for sample in samples)
+            )
+        return result
+
+def make_trace_config() -> aiohttp.TraceConfig:
+    """
+    Fills the `RequestSample` given as `trace_request_ctx` with the connection reuse information
+    """
+    async def on_connection_create_end(session: aiohttp.ClientSession, context: SimpleNamespace, params) -> None:
+        if isinstance(context.trace_request_ctx, RequestSample):
+            context.trace_request_ctx.reused_connection = False
+
+    async def on_connection_reuseconn(session: aiohttp.ClientSession, context: SimpleNamespace, params) -> None:
+        if isinstance(context.trace_request_ctx, RequestSample):
+            context.trace_request_ctx.reused_connection = True
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
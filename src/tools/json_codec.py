@@ -0,0 +1,40 @@
+"""
+JSON decoding of the upstream payloads (HTTP bodies and the JSON-in-JSON blobs stored by PlayFab).
+`orjson` is used when it is installed (`uv pip install orjson`), the standard `json` module otherwise.
+Both decode directly from the raw response bytes, so no intermediate `str` is built.
+- https://github.com/ijl/orjson
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError: # optional dependency
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# both `json.JSONDecodeError` and `orjson.JSONDecodeError` inherit from it
+JSONDecodeError = ValueError
+
+def loads_stdlib(data: bytes | bytearray | memoryview | str) -> Any:
+    if isinstance(data, memoryview):
+        data = bytes(data)
+    return json.loads(data)
+
+if orjson is not None:
+    def loads(data: bytes | bytearray | memoryview | str) -> Any:
+        """ Decodes a JSON document (raises a `ValueError` if it is invalid) """
+        return orjson.loads(data)
+else:
+    loads = loads_stdlib
+
+def loads_blob(blob: str | None, default: Any) -> Any:
+    """
+    Decodes a JSON document stored as a string inside another payload (PlayFab user data values),
+    `default` is returned if the blob is missing or empty.
+    """
+    if not blob:
+        return default
+    return loads(blob)
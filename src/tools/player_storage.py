@@ -0,0 +1,350 @@
+from discord.ext import commands
+import asqlite
+import asyncio
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from datetime import (
+    datetime,
+    timedelta,
+    timezone
+)
+
+# bot files
+from data.constants import DefaultEmojis
+from tools.json_codec import loads as json_loads
+from tools.log_builder import (
+    LogColor,
+    BOTLOG,
+    log
+)
+
+# the in-game moderators are few and rarely renamed: their names are kept that long (in days)
+LIFETIME_PLAYER_NAME = 7
+PLAYER_NAMES_CACHE_MAX_SIZE = 512 # names kept in memory (LRU), the others are read again from the database
+# progress snapshots are stored as deltas against the previous one, with a full snapshot every...
+SNAPSHOT_KEYFRAME_INTERVAL = 20
+SNAPSHOT_CACHE_MAX_SIZE = 256 # last snapshots kept in memory (LRU), the others are rebuilt from the database
+SNAPSHOT_LOCK_STRIPES = 64 # the players share this many locks (see `add_snapshot`)
+
+@dataclass
+class WatchedPlayer:
+    playfab_id: str
+    name: str
+    reason: Optional[str]
+    added_by: int # Discord user id
+    added_at: datetime
+    state: dict # last state seen by the watchlist sweeps (see `WatchlistCog`)
+
+class PlayerStorage():
+    """
+    Persistent data about the players of the game, independent of the Discord server
+    (PlayFabId -> name resolutions, progress snapshots, staff watchlist)
+    """
+    def __init__(self, bot: commands.Bot, pool: asqlite.Pool):
+        self._bot = bot
+        self._pool = pool
+        self._names_cache: OrderedDict[str, tuple[str, datetime]] = OrderedDict() # PlayFabId -> (name, resolution date)
+        self._last_snapshots: OrderedDict[str, tuple[dict[str, int], int]] = OrderedDict() # PlayFabId -> (counters, deltas since the keyframe)
+        self._snapshot_locks = [asyncio.Lock() for _ in range(SNAPSHOT_LOCK_STRIPES)] # locks of the read-diff-write (see `add_snapshot`)
+
+    async def init_tables(self) -> None:
+        try:
+            async with self._pool.acquire() as conn:
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS player_names (
+                        playfab_id TEXT PRIMARY KEY NOT NULL,
+                        name TEXT NOT NULL,
+                        resolved_at TEXT NOT NULL
+                    )
+                    """
+                )
+                await conn.execute("DROP INDEX IF EXISTS player_names_by_name") # the snapshots have their own name index now
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS player_snapshots (
+                        playfab_id TEXT NOT NULL,
+                        taken_at TEXT NOT NULL,
+                        is_keyframe INTEGER NOT NULL,
+                        data TEXT NOT NULL,
+                        PRIMARY KEY (playfab_id, taken_at)
+                    )
+                    """
+                )
+                # names of the players with snapshots, to find them by name (`/player_progress`)
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS snapshot_names (
+                        playfab_id TEXT PRIMARY KEY NOT NULL,
+                        name TEXT NOT NULL,
+                        seen_at TEXT NOT NULL
+                    )
+                    """
+                )
+                await conn.execute("CREATE INDEX IF NOT EXISTS snapshot_names_by_name ON snapshot_names(name COLLATE NOCASE)")
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS player_watchlist (
+                        playfab_id TEXT PRIMARY KEY NOT NULL,
+                        name TEXT NOT NULL,
+                        reason TEXT,
+                        added_by INTEGER NOT NULL,
+                        added_at TEXT NOT NULL,
+                        state TEXT NOT NULL
+                    )
+                    """
+                )
+                await conn.commit()
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.CRITICAL} CRITICAL ERROR - An exception was raised during init of the player tables", msg=f"```\n{e}\n```"
+            )
+
+    # ---------------------------------- player names
+    async def get_names(self, playfab_ids: set[str]) -> dict[str, str]:
+        """
+        Returns the known names of `playfab_ids` (those that are unknown or expired are missing from the result)
+        """
+        expired_before = datetime.now(timezone.utc) - timedelta(days=LIFETIME_PLAYER_NAME)
+        names: dict[str, str] = {}
+        for playfab_id in playfab_ids:
+            cached = self._names_cache.get(playfab_id)
+            if cached and cached[1] > expired_before:
+                self._names_cache.move_to_end(playfab_id)
+                names[playfab_id] = cached[0]
+
+        missing = [playfab_id for playfab_id in playfab_ids if playfab_id not in names]
+        if not missing:
+            return names
+        try:
+            async with self._pool.acquire() as conn:
+                cur = await conn.execute(
+                    f"SELECT playfab_id, name, resolved_at FROM player_names WHERE playfab_id IN ({', '.join('?' * len(missing))}) AND resolved_at > ?",
+                    (*missing, expired_before.isoformat())
+                )
+                for playfab_id, name, resolved_at in await cur.fetchall():
+                    self._cache_name(playfab_id, name, datetime.fromisoformat(resolved_at))
+                    names[playfab_id] = name
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Unable to get player names from db", msg=(f"```\n{e}\n```")
+            )
+        return names
+
+    def _cache_name(self, playfab_id: str, name: str, resolved_at: datetime) -> None:
+        self._names_cache[playfab_id] = (name, resolved_at)
+        self._names_cache.move_to_end(playfab_id)
+        while len(self._names_cache) > PLAYER_NAMES_CACHE_MAX_SIZE:
+            self._names_cache.popitem(last=False)
+
+    async def save_names(self, names: dict[str, str]) -> None:
+        if not names:
+            return
+        resolved_at = datetime.now(timezone.utc)
+        for playfab_id, name in names.items():
+            self._cache_name(playfab_id, name, resolved_at)
+        try:
+            async with self._pool.acquire() as conn:
+                await conn.executemany(
+                    "INSERT OR REPLACE INTO player_names(playfab_id, name, resolved_at) VALUES(?, ?, ?)",
+                    [(playfab_id, name, resolved_at.isoformat()) for playfab_id, name in names.items()]
+                )
+                await conn.commit()
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Error during the saving of player names", msg=(f"```\n{e}\n```")
+            )
+
+    async def find_player_id(self, name: str) -> Optional[str]:
+        """
+        Returns the PlayFabId of the last player with snapshots seen under this name (case insensitive), without asking PlayFab
+        """
+        try:
+            async with self._pool.acquire() as conn:
+                cur = await conn.execute(
+                    "SELECT playfab_id FROM snapshot_names WHERE name = ? COLLATE NOCASE ORDER BY seen_at DESC LIMIT 1", (name.strip(),)
+                )
+                row = await cur.fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Unable to search a player by name in db", msg=(f"*Name: {name}*\n```\n{e}\n```")
+            )
+            return None
+
+    # ---------------------------------- progress snapshots
+    async def add_snapshot(self, playfab_id: str, name: str, counters: dict[str, int]) -> None:
+        """
+        Records the counters of a player (see `PlayerProfile.counters`) and the name they were seen under,
+        unless they haven't changed since the previous snapshot
+        """
+        # the delta is computed against the previous snapshot: two concurrent snapshots of the same player
+        # (e.g. the watchlist sweep during a `/player_info`) must not both be diffed against the same one
+        lock = self._snapshot_locks[hash(playfab_id) % SNAPSHOT_LOCK_STRIPES]
+        try:
+            async with lock, self._pool.acquire() as conn:
+                previous = self._last_snapshots.get(playfab_id)
+                if previous is None:
+                    snapshot = await self._read_snapshot(conn, playfab_id)
+                    previous = (snapshot[1], snapshot[2]) if snapshot else None
+                if previous is not None:
+                    last_counters = previous[0]
+                    changes = {
+                        key: counters.get(key, 0) - last_counters.get(key, 0)
+                        for key in counters.keys() | last_counters.keys()
+                        if counters.get(key, 0) != last_counters.get(key, 0)
+                    }
+                    if not changes:
+                        self._remember_snapshot(playfab_id, previous)
+                        return
+
+                if previous is None or previous[1] + 1 >= SNAPSHOT_KEYFRAME_INTERVAL:
+                    is_keyframe, data, deltas = True, counters, 0
+                else:
+                    is_keyframe, data, deltas = False, changes, previous[1] + 1
+                taken_at = datetime.now(timezone.utc).isoformat()
+                await conn.execute(
+                    "INSERT OR REPLACE INTO player_snapshots(playfab_id, taken_at, is_keyframe, data) VALUES(?, ?, ?, ?)",
+                    (playfab_id, taken_at, int(is_keyframe), json.dumps(data, separators=(',', ':')))
+                )
+                if name and name != "*Unknown*":
+                    await conn.execute(
+                        "INSERT OR REPLACE INTO snapshot_names(playfab_id, name, seen_at) VALUES(?, ?, ?)", (playfab_id, name, taken_at)
+                    )
+                await conn.commit()
+                self._remember_snapshot(playfab_id, (dict(counters), deltas))
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Error during the saving of a player snapshot", msg=(f"*PlayFabId: {playfab_id}*\n```\n{e}\n```")
+            )
+
+    def _remember_snapshot(self, playfab_id: str, snapshot: tuple[dict[str, int], int]) -> None:
+        self._last_snapshots[playfab_id] = snapshot
+        self._last_snapshots.move_to_end(playfab_id)
+        while len(self._last_snapshots) > SNAPSHOT_CACHE_MAX_SIZE:
+            self._last_snapshots.popitem(last=False)
+
+    async def _read_snapshot(self, conn: asqlite.Connection, playfab_id: str, until: Optional[datetime] = None) -> Optional[tuple[datetime, dict[str, int], int]]:
+        """
+        Rebuilds the last snapshot taken at or before `until` (the last one if `None`): returns its date,
+        its counters and the number of deltas applied to the keyframe
+        """
+        until_iso = (until or datetime.now(timezone.utc)).isoformat()
+        cur = await conn.execute(
+            "SELECT taken_at FROM player_snapshots WHERE playfab_id = ? AND is_keyframe = 1 AND taken_at <= ? ORDER BY taken_at DESC LIMIT 1",
+            (playfab_id, until_iso)
+        )
+        keyframe = await cur.fetchone()
+        if not keyframe:
+            return None
+        cur = await conn.execute(
+            "SELECT taken_at, data FROM player_snapshots WHERE playfab_id = ? AND taken_at >= ? AND taken_at <= ? ORDER BY taken_at",
+            (playfab_id, keyframe[0], until_iso)
+        )
+        rows = await cur.fetchall()
+        counters: dict[str, int] = {}
+        for _, data in rows:
+            for key, value in json_loads(data).items():
+                counters[key] = counters.get(key, 0) + value
+        return (datetime.fromisoformat(rows[-1][0]), counters, len(rows) - 1)
+
+    async def get_progress(self, playfab_id: str, since: Optional[datetime]) -> Optional[tuple[tuple[datetime, dict[str, int]], tuple[datetime, dict[str, int]]]]:
+        """
+        Returns the (date, counters) of the snapshot of the player at `since` (or the first one after it if there is none
+        before, or the first one ever if `since` is `None`) and of the last one. `None` if the player has no snapshot.
+        """
+        try:
+            async with self._pool.acquire() as conn:
+                last = await self._read_snapshot(conn, playfab_id)
+                if last is None:
+                    return None
+                first = await self._read_snapshot(conn, playfab_id, since) if since else None
+                if first is None:
+                    cur = await conn.execute(
+                        "SELECT taken_at FROM player_snapshots WHERE playfab_id = ? AND taken_at >= ? ORDER BY taken_at LIMIT 1",
+                        (playfab_id, since.isoformat() if since else '')
+                    )
+                    row = await cur.fetchone()
+                    first = await self._read_snapshot(conn, playfab_id, datetime.fromisoformat(row[0]))
+                return ((first[0], first[1]), (last[0], last[1]))
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Unable to get the progress of a player from db", msg=(f"*PlayFabId: {playfab_id}*\n```\n{e}\n```")
+            )
+            return None
+
+    # ---------------------------------- watchlist
+    async def add_watched_player(self, playfab_id: str, name: str, reason: Optional[str], added_by: int, state: dict) -> bool:
+        """ Returns `False` if the player was already watched (or in case of error) """
+        try:
+            async with self._pool.acquire() as conn:
+                cur = await conn.execute(
+                    "INSERT OR IGNORE INTO player_watchlist(playfab_id, name, reason, added_by, added_at, state) VALUES(?, ?, ?, ?, ?, ?)",
+                    (playfab_id, name, reason, added_by, datetime.now(timezone.utc).isoformat(), json.dumps(state))
+                )
+                await conn.commit()
+                return cur.get_cursor().rowcount > 0
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Error while adding a player to the watchlist", msg=(f"*PlayFabId: {playfab_id}*\n```\n{e}\n```")
+            )
+            return False
+
+    async def remove_watched_player(self, name: str) -> Optional[str]:
+        """ Removes the watched player known under this name (case insensitive) and returns its PlayFabId, `None` if there is none """
+        try:
+            async with self._pool.acquire() as conn:
+                cur = await conn.execute("SELECT playfab_id FROM player_watchlist WHERE name = ? COLLATE NOCASE", (name.strip(),))
+                row = await cur.fetchone()
+                if not row:
+                    return None
+                await conn.execute("DELETE FROM player_watchlist WHERE playfab_id = ?", (row[0],))
+                await conn.commit()
+                return row[0]
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Error while removing a player from the watchlist", msg=(f"*Name: {name}*\n```\n{e}\n```")
+            )
+            return None
+
+    async def get_watchlist(self) -> list[WatchedPlayer]:
+        try:
+            async with self._pool.acquire() as conn:
+                cur = await conn.execute("SELECT playfab_id, name, reason, added_by, added_at, state FROM player_watchlist ORDER BY added_at")
+                return [
+                    WatchedPlayer(playfab_id, name, reason, added_by, datetime.fromisoformat(added_at), json_loads(state))
+                    for playfab_id, name, reason, added_by, added_at, state in await cur.fetchall()
+                ]
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Unable to get the watchlist from db", msg=(f"```\n{e}\n```")
+            )
+            return []
+
+    async def save_watch_states(self, states: dict[str, tuple[str, dict]]) -> None:
+        """ Updates the name and state of watched players (PlayFabId -> (name, state)), those removed meanwhile are ignored """
+        if not states:
+            return
+        try:
+            async with self._pool.acquire() as conn:
+                await conn.executemany(
+                    "UPDATE player_watchlist SET name = ?, state = ? WHERE playfab_id = ?",
+                    [(name, json.dumps(state), playfab_id) for playfab_id, (name, state) in states.items()]
+                )
+                await conn.commit()
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Error during the saving of the watchlist states", msg=(f"```\n{e}\n```")
+            )
@@ -1,12 +1,14 @@
-import json
-import aiohttp
+import asyncio
+import hashlib
 import re
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Optional
-from io import BytesIO
-from PIL import (
-    Image,
-    ImageDraw
+from typing import (
+    Awaitable,
+    Callable,
+    Optional,
+    TypeVar
 )
 
 from datetime import (
@@ -24,49 +26,100 @@ from tools.typing import (
 from tools.api_client import (
     PublicAPI,
     PlayFabAPI,
-    PlayFabClient
+    PlayFabClient,
+    HTTPClient,
+    Deadline,
+    EndpointFamily,
+    RequestPriority,
+    SingleFlight,
+    UpstreamUnavailable,
+    AccountNotFound
 )
 
+from tools.color_theme import color_themes
+from tools.json_codec import (
+    JSONDecodeError,
+    loads as json_loads,
+    loads_blob
+)
+
+T = TypeVar("T")
+
+# ---------------------------------- last known good
+async def with_last_known_good(
+        http_client: HTTPClient, key: str,
+        fetch: Callable[[Optional[Deadline]], Awaitable[Optional[T]]], deadline: Optional[Deadline],
+        priority: RequestPriority = RequestPriority.INTERACTIVE
+    ) -> Optional[T]:
+    """
+    Runs `fetch` through the last known good storage of the client (see `UpstreamStorage.fetch`), if it has one
+    """
+    if http_client.last_known_good is None:
+        return await fetch(deadline)
+    return await http_client.last_known_good.fetch(key, fetch, deadline, priority)
+
 # ---------------------------------- basic game info function
-async def fetch_game_version(playfab_connection: PlayFabClient) -> Optional[str]:
+async def fetch_game_version(
+        playfab_connection: PlayFabClient, deadline: Optional[Deadline] = None,
+        priority: RequestPriority = RequestPriority.INTERACTIVE
+    ) -> Optional[str]:
     """
     returns the formatted game version: v + MajorGameVersion.MinorGameVersion.ClientVersion
     """
-    data = await playfab_connection.call_client_api(PlayFabAPI.GET_GAME_VERSION, { "Keys": ["GameInfo"] })
-    if not data:
+    async def fetch_version(deadline: Optional[Deadline]) -> Optional[str]:
+        async def fetch() -> Optional[str]:
+            data = await playfab_connection.call_client_api(PlayFabAPI.GET_GAME_VERSION, { "Keys": ["GameInfo"] }, deadline, priority)
+            if not data:
+                return None
+            return json_loads(data["data"]["Data"]["GameInfo"])["GameVersion"]
+        return await playfab_connection.http_client.cached(PlayFabAPI.GET_GAME_VERSION, fetch, deadline=deadline)
+    try:
+        return await with_last_known_good(playfab_connection.http_client, PlayFabAPI.GET_GAME_VERSION, fetch_version, deadline, priority)
+    except Exception:
         return None
-    game_version = json.loads(data["data"]["Data"]["GameInfo"])["GameVersion"]
-    return game_version
 
-async def fetch_build_date(url: str) -> Optional[datetime]:
+async def fetch_build_date(
+        http_client: HTTPClient, url: str, deadline: Optional[Deadline] = None,
+        priority: RequestPriority = RequestPriority.INTERACTIVE
+    ) -> Optional[datetime]:
     """
     Returns the last modified date for the requested build file
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.head(url, headers={ "User-Agent": "Mozilla/5.0" }) as resp:
-            last_mod = resp.headers.get("Last-Modified")
-            if last_mod:
-                return datetime.strptime(last_mod, "%a, %d %b %Y %H:%M:%S %Z")
+    async def fetch_last_modified(deadline: Optional[Deadline]) -> Optional[str]:
+        headers = await http_client.head(url, headers={ "User-Agent": "Mozilla/5.0" }, deadline=deadline)
+        return headers.get("Last-Modified")
+    try:
+        last_mod = await with_last_known_good(http_client, url, fetch_last_modified, deadline, priority)
+    except Exception:
+        return None
+    if last_mod:
+        return datetime.strptime(last_mod, "%a, %d %b %Y %H:%M:%S %Z")
     return None
 
 # ---------------------------------- game ccu and server status
-async def fetch_regions_list() -> list[str]:
+async def fetch_regions_list(http_client: HTTPClient, deadline: Optional[Deadline] = None) -> list[str]:
     """
     returns a list of available region **names** (nothing else)
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(PublicAPI.REGIONS) as resp_servers:
-            data: dict = await resp_servers.json()
-            servers = data.get("regionList", [])
+    async def fetch(deadline: Optional[Deadline]) -> Optional[dict]:
+        return await http_client.get_json(PublicAPI.REGIONS, deadline=deadline)
+    try:
+        data: dict = await with_last_known_good(http_client, PublicAPI.REGIONS, fetch, deadline)
+    except Exception:
+        return []
+    servers = data.get("regionList", [])
 
     regions: list[str] = [region["region"] for region in servers]
     return regions
 
-async def fetch_server_stats() -> Optional[tuple[datetime, list[GameRegion], GameRegion]]:
+async def fetch_server_stats(
+        http_client: HTTPClient, deadline: Optional[Deadline] = None,
+        priority: RequestPriority = RequestPriority.INTERACTIVE
+    ) -> Optional[tuple[datetime, list[GameRegion], GameRegion]]:
+    async def fetch(deadline: Optional[Deadline]) -> Optional[dict]:
+        return await http_client.get_json(PublicAPI.CCU, deadline=deadline)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(PublicAPI.CCU) as resp_ccu:
-                ccu: dict = await resp_ccu.json()
+        ccu: dict = await with_last_known_good(http_client, PublicAPI.CCU, fetch, deadline, priority)
     except Exception:
         return None
 
@@ -85,12 +138,23 @@ async def fetch_server_stats() -> Optional[tuple[datetime, list[GameRegion], Gam
 
     return (updated_at, region_stats, global_stats)
 
-async def fetch_games_list(region: str) -> Optional[dict[GamePlaylist, list[GameInProgress]]]:
+def games_list_key(region: str) -> str:
+    """ Key of the server list of `region` in the last known good storage """
+    return PublicAPI.GET_GAME_LIST.format(region=region)
+
+async def fetch_games_list(http_client: HTTPClient, region: str, deadline: Optional[Deadline] = None) -> Optional[dict[GamePlaylist, list[GameInProgress]]]:
+    """
+    Returns the games in progress in a region, sorted by playlist (`None` if the list is unusable).
+    Raises `UpstreamUnavailable` if the region servers cannot answer before the deadline
+    and no previous list of this region is known.
+    """
+    async def fetch(deadline: Optional[Deadline]) -> Optional[dict]:
+        return await http_client.get_json(PublicAPI.GET_GAME_LIST, deadline=deadline, region=region)
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(PublicAPI.GET_GAME_LIST.format(region=region)) as resp:
-                data: dict = await resp.json()
-                game_list: dict = data.get("serverList", {})
+        data: dict = await with_last_known_good(http_client, games_list_key(region), fetch, deadline)
+        game_list: dict = data.get("serverList", {})
+    except UpstreamUnavailable:
+        raise
     except Exception:
         return None
 
@@ -108,6 +172,35 @@ async def fetch_games_list(region: str) -> Optional[dict[GamePlaylist, list[Game
 
     return result or None
 
+# ---------------------------------- startup warm-up
+WARM_UP_DEADLINE_S = 20
+
+async def warm_up(http_client: HTTPClient, playfab_connection: PlayFabClient) -> tuple[int, int]:
+    """
+    Logs into PlayFab and prefetches the game data (regions and their server lists, CCU, game version, build dates),
+    which opens the pooled connections to all the known hosts and fills the caches, so that the first commands
+    don't have to pay for it. Meant to run in background at startup.
+
+    Returns the number of successful steps and the total number of steps.
+    """
+    deadline = Deadline(WARM_UP_DEADLINE_S)
+    async def warm_up_regions() -> bool:
+        regions = await fetch_regions_list(http_client, deadline)
+        games_lists = await asyncio.gather(*(fetch_games_list(http_client, region, deadline) for region in regions), return_exceptions=True)
+        return bool(regions) and all(isinstance(games, dict) for games in games_lists)
+
+    results = await asyncio.gather(
+        playfab_connection.get_token(),
+        fetch_game_version(playfab_connection, deadline, RequestPriority.BACKGROUND),
+        fetch_server_stats(http_client, deadline, RequestPriority.BACKGROUND),
+        fetch_build_date(http_client, PublicAPI.BUILD, deadline, RequestPriority.BACKGROUND),
+        fetch_build_date(http_client, PublicAPI.BETA_BUILD, deadline, RequestPriority.BACKGROUND),
+        warm_up_regions(),
+        return_exceptions=True
+    )
+    succeeded = sum(1 for result in results if result and not isinstance(result, BaseException))
+    return (succeeded, len(results))
+
 # ---------------------------------- Player Analysis
 PLAYER_XP_LEVELS = [ # AUTOGENERATED FROM XpManager – DO NOT HAND EDIT
     1000,   1757,   3982,   7601,   12544,  18738,  26111,  34591,  44107,  54587,
@@ -122,17 +215,65 @@ PLAYER_XP_LEVELS = [ # AUTOGENERATED FROM XpManager – DO NOT HAND EDIT
     769402, 790721, 813138, 836682, 861382, 887267, 914366, 942708, 972322, 1000000
 ]
 
-WEAPON_PARSING_TABLE = {
+# ---------------------------------- profile decoding tables
+# adding a statistic only takes a line here (and its display in the stats cog)
+PROPERTY_FIELDS: dict[str, str] = { # key of the `Properties` blob -> PlayerProfile field
+    "Level": "level",
+    "Experience": "xp",
+    "verificationProperties": "_clan"
+}
+
+ACHIEVEMENT_FIELDS: dict[str, str] = { # id of `achievementProgressions` -> PlayerProfile field
+    "kills": "kills",
+    "deaths": "deaths",
+    "games": "matches",
+    "wins": "wins",
+    "flags": "flags",
+    "skulls": "skulls",
+    "winstreak": "winstreak",
+    "vehKills": "vehicle_kills",
+    "headshot": "headshot",
+    "kchain_x2": "double_kill",
+    "kchain_x3": "triple_kill",
+    "kchain_x4": "quad_kill",
+    "kchain_x5": "mega_kill",
+    "kchain_x6": "ultra_kill",
+    "kchain_x7": "monster_kill",
+    "killStreak_x4": "killing_spree",
+    "killStreak_x6": "dominating",
+    "killStreak_x8": "unstoppable",
+    "killStreak_x10": "godlike",
+    "assist": "assist"
+}
+
+KILL_STAT_LABELS: dict[str, str] = { # id of `killStats` (lowercased, as in `PlayerProfile.kill_stats`) -> weapon name
     "crifle": "Combat Rifle",
     "arifle": "Assault Rifle",
     "brifle": "Burst Rifle",
-    "pBlaster": "Plasma Blaster",
-    "pRocket": "Pocket Rocket",
-    "mechProj": "Mech",
-    "dBarrel": "Double Barrel"
+    "pblaster": "Plasma Blaster",
+    "procket": "Pocket Rocket",
+    "mechproj": "Mech",
+    "dbarrel": "Double Barrel"
+}
+BEST_WEAPONS_COUNT = 5
+
+# blob of the CloudScript result -> (its container, the PlayerProfile fields decoded from it). A blob whose version
+# (see `section_version`) hasn't changed since the previous profile of the player is not decoded again: these fields are reused as they are.
+PROFILE_SECTIONS: dict[str, tuple[str, tuple[str, ...]]] = {
+    "Properties": ("UserReadOnlyData", (
+        "is_admin", "achievements", "kill_stats", "_best_weapons", *PROPERTY_FIELDS.values(), *ACHIEVEMENT_FIELDS.values()
+    )),
+    "mod_notes": ("UserReadOnlyData", ("_raw_mod_notes", "_mod_notes", "mod_history")),
+    "Loadout": ("UserData", ("_raw_loadout", "_avatar_mods", "_primary_color", "_secondary_color", "color_theme"))
 }
 
-@dataclass
+def weapon_label(weapon: str) -> str:
+    """ Readable name of a weapon id of the killStats """
+    if len(weapon) == 3:
+        return weapon.upper()
+    return KILL_STAT_LABELS.get(weapon.lower()) or weapon.replace('_', ' ').title()
+
+@dataclass(slots=True)
 class ModEntry:
     moderator: str = None
     created_at: datetime = None
@@ -140,6 +281,42 @@ class ModEntry:
     content: str = None
 
 class PlayerProfile:
+    """
+    Decoded profile of a player. Its fields are slots (profiles are cached by hundreds): the statistics
+    are those of `ACHIEVEMENT_FIELDS`, filled by `decode_profile`. The sections that only some tabs of
+    `/player_info` show (moderation notes, loadout) are kept raw and decoded on first access, and what they
+    need from outside (moderator names, color theme) is loaded on demand (see `load_mod_history` and `load_color_theme`).
+    """
+    __slots__ = (
+        "display_name", "username", "playfab_id", "is_admin", "created", "_clan",
+        "_raw_mod_notes", "_mod_notes", "mod_history",
+        "_raw_loadout", "_avatar_mods", "_primary_color", "_secondary_color", "color_theme",
+        "level", "xp", "_best_weapons", "achievements", "kill_stats", "data_versions",
+        *ACHIEVEMENT_FIELDS.values()
+    )
+    # Player statistics (see ACHIEVEMENT_FIELDS)
+    kills: int
+    deaths: int
+    matches: int
+    wins: int
+    flags: int
+    skulls: int
+    winstreak: int
+    # kills statistics
+    vehicle_kills: int
+    headshot: int
+    double_kill: int
+    triple_kill: int
+    quad_kill: int
+    mega_kill: int
+    ultra_kill: int
+    monster_kill: int
+    killing_spree: int
+    dominating: int
+    unstoppable: int
+    godlike: int
+    assist: int
+
     def __init__(self):
         # Account information
         self.display_name: str = None
@@ -148,37 +325,25 @@ class PlayerProfile:
         self.is_admin: bool = False
         self.created: datetime = None
         self._clan: str = None
-        self.mod_history: list[ModEntry] = []
-        # Avatar
-        self.primary_color: str | None = None
-        self.secondary_color: str | None = None
-        self.color_theme: tuple[BytesIO, str] | None = None
-        self._avatar_mods: list[str] = []
+        # Moderation (decoded on first access)
+        self._raw_mod_notes: str | None = None
+        self._mod_notes: list[dict] | None = None
+        self.mod_history: list[ModEntry] | None = None # None until `load_mod_history`
+        # Avatar (decoded on first access)
+        self._raw_loadout: str | None = None
+        self._avatar_mods: list[str] | None = None
+        self._primary_color: str | None = None
+        self._secondary_color: str | None = None
+        self.color_theme: tuple[bytes, str] | None = None # PNG, file name (None until `load_color_theme`)
         # Player statistics
         self.level: int = 0
         self.xp: int = 0
-        self.matches: int = 0
-        self.wins: int = 0
-        self.kills: int = 0
-        self.deaths: int = 0
-        self.flags: int = 0
-        self.skulls: int = 0
-        self.winstreak: int = 0
         self._best_weapons: dict[str, int] = {}
-        # kills statistics
-        self.vehicle_kills: int = 0
-        self.headshot: int = 0
-        self.double_kill: int = 0
-        self.triple_kill: int = 0
-        self.quad_kill: int = 0
-        self.mega_kill: int = 0
-        self.ultra_kill: int = 0
-        self.monster_kill: int = 0
-        self.killing_spree: int = 0
-        self.dominating: int = 0
-        self.unstoppable: int = 0
-        self.godlike: int = 0
-        self.assist: int = 0
+        self.achievements: dict[str, int] = {}
+        self.kill_stats: dict[str, int] = {}
+        self.data_versions: dict[str, int | str | None] = {} # version of each decoded blob (see `section_version`)
+        for field in ACHIEVEMENT_FIELDS.values():
+            setattr(self, field, 0)
 
     @property
     def name(self) -> str:
@@ -216,15 +381,67 @@ class PlayerProfile:
     def best_weapons(self) -> Optional[str]:
         weapons_text: list[str] = []
         for weapon, count in self._best_weapons.items():
-            if len(weapon) == 3:
-                weapon = weapon.upper()
-            elif weapon in WEAPON_PARSING_TABLE:
-                weapon = WEAPON_PARSING_TABLE.get(weapon)
-            weapons_text.append(f"> **{weapon.replace('_', ' ').title()}**: {count:,}")
+            weapons_text.append(f"> **{weapon_label(weapon)}**: {count:,}")
         return '\n'.join(weapons_text) if weapons_text else None
 
+    def counters(self) -> dict[str, int]:
+        """
+        Flat counters of the player, as stored in the progress snapshots (kills, deaths, matches and wins
+        are the `achievements.kills`, `achievements.deaths`, `achievements.games` and `achievements.wins` ones)
+        """
+        return {
+            "level": self.level,
+            "xp": self.xp,
+            **{f"achievements.{achievement}": count for achievement, count in self.achievements.items()},
+            **{f"killStats.{weapon}": count for weapon, count in self.kill_stats.items()}
+        }
+
+    # ---------------------------------- lazily decoded sections
+    @property
+    def mod_notes(self) -> list[dict]:
+        """ Raw moderation notes, whose authors are not resolved yet (see `load_mod_history`) """
+        if self._mod_notes is None:
+            try:
+                self._mod_notes = [entry for entry in loads_blob(self._raw_mod_notes, []) if isinstance(entry, dict)]
+            except JSONDecodeError:
+                self._mod_notes = []
+            self._raw_mod_notes = None
+        return self._mod_notes
+
+    def _decode_loadout(self) -> None:
+        if self._avatar_mods is not None:
+            return
+        try:
+            avatar = dict(loads_blob(self._raw_loadout, {}))
+        except JSONDecodeError:
+            avatar = {}
+        self._raw_loadout = None
+        self._avatar_mods = [str(mod) for mod in avatar.get("avatarMods", [])]
+        if avatar.get("color_pri", None):
+            self._primary_color = f"#{avatar["color_pri"]}"
+        if avatar.get("color_sec", None):
+            self._secondary_color = f"#{avatar["color_sec"]}"
+
+    @property
+    def has_loadout(self) -> bool:
+        """ Whether the player has an avatar loadout (without decoding it) """
+        if self._avatar_mods is None:
+            return bool(self._raw_loadout) and self._raw_loadout != "{}"
+        return bool(self._avatar_mods or self._primary_color or self._secondary_color)
+
+    @property
+    def primary_color(self) -> Optional[str]:
+        self._decode_loadout()
+        return self._primary_color
+
+    @property
+    def secondary_color(self) -> Optional[str]:
+        self._decode_loadout()
+        return self._secondary_color
+
     @property
     def avatar_mods(self) -> Optional[str]:
+        self._decode_loadout()
         mods_text: list[str] = []
         for mod in self._avatar_mods:
             mod = mod.strip()
@@ -234,118 +451,348 @@ class PlayerProfile:
                 mods_text.append(f"> - **{mod.removeprefix("mod_").replace('_', ' ').title()}**") 
         return '\n'.join(mods_text) if mods_text else None
 
-async def fetch_player(playfab_connection: PlayFabClient, name: str) -> Optional[PlayerProfile]:
+MODERATOR_LOOKUP_CONCURRENCY = 4 # simultaneous SEARCH_PLAYER calls for the name resolutions (all lookups together)
+NAME_LOOKUP_FAILURE_TTL_S = 60 # players whose name couldn't be resolved (not found or failed lookup) are not looked up again before that
+_name_lookup_slots = asyncio.Semaphore(MODERATOR_LOOKUP_CONCURRENCY)
+_name_lookups = SingleFlight()
+_name_lookup_failures: dict[str, float] = {} # PlayFabId -> monotonic expiration
+
+async def lookup_player_name(playfab_connection: PlayFabClient, playfab_id: str, priority: RequestPriority) -> Optional[str]:
+    async with _name_lookup_slots:
+        data = await playfab_connection.call_client_api(PlayFabAPI.SEARCH_PLAYER, {"PlayFabId": playfab_id}, priority=priority)
+    account_info = dict((data or {}).get("data", {})).get("AccountInfo")
+    if not account_info:
+        return None
+    name = account_info.get("Username") or account_info.get("TitleInfo", {}).get("DisplayName")
+    if name and playfab_connection.player_storage:
+        await playfab_connection.player_storage.save_names({playfab_id: name})
+    return name
+
+async def resolve_player_names(
+        playfab_connection: PlayFabClient, playfab_ids: set[str],
+        priority: RequestPriority = RequestPriority.INTERACTIVE
+    ) -> dict[str, Optional[str]]:
+    """
+    Returns the names of the given players (`None` if not found). Those not known by the player storage
+    are looked up concurrently (`MODERATOR_LOOKUP_CONCURRENCY` at a time), then stored. A lookup already
+    in progress for another profile (e.g. the same moderator in `/player_compare`) is shared, and a lookup
+    that failed is not retried before `NAME_LOOKUP_FAILURE_TTL_S`.
+    """
+    storage = playfab_connection.player_storage
+    names: dict[str, Optional[str]] = await storage.get_names(playfab_ids) if storage else {}
+
+    now = time.monotonic()
+    missing = [playfab_id for playfab_id in playfab_ids - names.keys() if _name_lookup_failures.get(playfab_id, 0) <= now]
+    resolved = await asyncio.gather(*(
+        _name_lookups.run(playfab_id, lambda playfab_id=playfab_id: lookup_player_name(playfab_connection, playfab_id, priority))
+        for playfab_id in missing
+    ))
+
+    failures = [playfab_id for playfab_id, name in zip(missing, resolved) if name is None]
+    if failures:
+        now = time.monotonic()
+        for playfab_id, expiration in list(_name_lookup_failures.items()):
+            if expiration <= now:
+                del _name_lookup_failures[playfab_id]
+        _name_lookup_failures.update(dict.fromkeys(failures, now + NAME_LOOKUP_FAILURE_TTL_S))
+    return dict.fromkeys(playfab_ids) | names | dict(zip(missing, resolved))
+
+async def search_account(playfab_connection: PlayFabClient, query: dict, priority: RequestPriority) -> tuple[Optional[dict], bool]:
+    """ Returns the answer of PlayFab (`None` if it failed) and whether the account was found not to exist """
+    try:
+        return (await playfab_connection.call_client_api(PlayFabAPI.SEARCH_PLAYER, query, priority=priority, raise_not_found=True), False)
+    except AccountNotFound:
+        return (None, True)
+
+HEDGED_ACCOUNT_LOOKUP = True # slow interactive lookups search by display name and by username at the same time
+ACCOUNT_LOOKUP_HEDGE_PERCENTILE = 95 # the username search is sent early if the display name one is slower than that...
+ACCOUNT_LOOKUP_HEDGE_DEFAULT_S = 0.5 # ...or than this delay, while no PlayFab account latency has been measured
+
+async def find_account(
+        playfab_connection: PlayFabClient, name: str, priority: RequestPriority, hedged: bool = True
+    ) -> tuple[Optional[dict], bool]:
+    """
+    Searches the account by display name, then by username. Returns the answer of PlayFab (`None` if
+    the lookup failed) and whether it was found by username; raises `AccountNotFound` if neither exists.
+
+    Interactive lookups are hedged (see `HEDGED_ACCOUNT_LOOKUP`): if the display name search is slower than
+    usual, the username search is sent without waiting for it, and cancelled as soon as the display name
+    (which is preferred) is found. Batches of lookups should not be hedged (`hedged=False`): each hedge takes
+    a token of the PlayFab rate limiter, which the other lookups of the batch are waiting for.
+    """
     # https://learn.microsoft.com/en-us/rest/api/playfab/client/account-management/get-account-info?view=playfab-rest
+    by_display_name = {"TitleDisplayName": name}
+    by_username = {"Username": ''.join(char for char in name if char.isalnum())}
+
+    if hedged and HEDGED_ACCOUNT_LOOKUP and priority == RequestPriority.INTERACTIVE:
+        hedge_delay = playfab_connection.http_client.metrics.latency_percentile(EndpointFamily.PLAYFAB_ACCOUNT, ACCOUNT_LOOKUP_HEDGE_PERCENTILE)
+        display_name_search = asyncio.create_task(search_account(playfab_connection, by_display_name, priority))
+        username_search: Optional[asyncio.Task] = None
+        try:
+            done, _ = await asyncio.wait({display_name_search}, timeout=hedge_delay or ACCOUNT_LOOKUP_HEDGE_DEFAULT_S)
+            if not done:
+                username_search = asyncio.create_task(search_account(playfab_connection, by_username, priority))
+            profile, display_name_not_found = await display_name_search
+            if profile:
+                return (profile, False)
+            profile, username_not_found = await (username_search or search_account(playfab_connection, by_username, priority))
+        finally:
+            display_name_search.cancel()
+            if username_search:
+                username_search.cancel()
+    else:
+        profile, display_name_not_found = await search_account(playfab_connection, by_display_name, priority)
+        if profile:
+            return (profile, False)
+        profile, username_not_found = await search_account(playfab_connection, by_username, priority)
+
+    if profile:
+        return (profile, True)
+    if display_name_not_found and username_not_found:
+        raise AccountNotFound(name)
+    return (None, False)
+
+async def load_player(
+        playfab_connection: PlayFabClient, name: str,
+        priority: RequestPriority = RequestPriority.INTERACTIVE, hedged: bool = True
+    ) -> Optional[PlayerProfile]:
+    """
+    Looks up and parses the profile of a player (without cache, see `fetch_player`; only the sections
+    of its previous profile that are still up to date are reused). Returns `None` if the lookup failed,
+    raises `AccountNotFound` if no player has this name. See `find_account` for `hedged`.
+    """
     player = PlayerProfile()
-    profile = await playfab_connection.call_client_api(PlayFabAPI.SEARCH_PLAYER, {"TitleDisplayName": name})
+    profile, found_by_username = await find_account(playfab_connection, name, priority, hedged)
     if not profile:
-        profile = await playfab_connection.call_client_api(PlayFabAPI.SEARCH_PLAYER, {"Username": ''.join(char for char in name if char.isalnum())})
-        if not profile:
-            return None
+        return None
+    if found_by_username:
         player.username = name
 
     player.created = datetime.fromisoformat(profile["data"]["AccountInfo"]["Created"])
-    target_player_id: str = profile["data"]["AccountInfo"]["PlayFabId"]
+    player.playfab_id = profile["data"]["AccountInfo"]["PlayFabId"]
+
+    result = await fetch_remote_profile(playfab_connection, player.playfab_id, priority)
+    if result is None:
+        return None
+    return decode_profile(player, result, player_cache.previous(player.playfab_id))
 
+async def fetch_remote_profile(playfab_connection: PlayFabClient, playfab_id: str, priority: RequestPriority) -> Optional[dict]:
+    """ Returns the raw profile of a player (CloudScript `getRemoteUserProfile`), `None` if the call failed """
     player_data = await playfab_connection.call_client_api(PlayFabAPI.GET_PLAYER_DATA, {
         "FunctionName": "getRemoteUserProfile",
-        "FunctionParameter": { "remoteId": target_player_id }
-    })
+        "FunctionParameter": { "remoteId": playfab_id }
+    }, priority=priority)
+    # a CloudScript error (e.g. script timeout) comes back as `Error` instead of `FunctionResult`
+    function_result = dict(player_data.get("data") or {}).get("FunctionResult") if player_data else None
+    return dict(function_result) if isinstance(function_result, dict) else None
 
-    result = dict(player_data["data"]["FunctionResult"])
+def section_version(result: dict, container: str, blob: str) -> int | str | None:
+    """
+    Version of a blob of the raw profile: the `DataVersion` of its container (bumped by PlayFab on each write
+    to the container, see GetUserData), or the `LastUpdated` date of the record if the container has none
+    """
+    data = result.get(container) or {}
+    version = data.get("DataVersion")
+    if version is None:
+        version = dict(data.get(blob) or {}).get("LastUpdated")
+    return version
+
+def decode_profile(player: PlayerProfile, result: dict, previous: Optional[PlayerProfile] = None) -> PlayerProfile:
+    """
+    Fills `player` (whose `playfab_id` is set) from its raw profile (see `fetch_remote_profile`). Only the statistics
+    are decoded here: the moderation notes and the loadout are decoded on first access (see `PlayerProfile`).
+    The sections of `previous` (an older profile of the same player) whose version is unchanged are reused instead.
+    """
     player.display_name = str(result.get("DisplayName"))
-    player.playfab_id = target_player_id
+    changed: set[str] = set()
+    for blob, (container, fields) in PROFILE_SECTIONS.items():
+        version = section_version(result, container, blob)
+        player.data_versions[blob] = version
+        if previous is not None and version is not None and previous.data_versions.get(blob) == version:
+            for field in fields:
+                setattr(player, field, getattr(previous, field))
+        else:
+            changed.add(blob)
+
+    if "mod_notes" in changed:
+        player._raw_mod_notes = result.get("UserReadOnlyData", {}).get("mod_notes", {}).get("Value")
+    if "Loadout" in changed:
+        player._raw_loadout = result.get("UserData", {}).get("Loadout", {}).get("Value")
+    if "Properties" not in changed:
+        return player
+
+    properties = dict(loads_blob(result.get("UserReadOnlyData", {}).get("Properties", {}).get("Value"), {}))
+    if properties:
+        for key, field in PROPERTY_FIELDS.items():
+            if key in properties:
+                setattr(player, field, properties[key])
+        player.is_admin = bool(properties.get("isAdmin", False))
+
+        player.achievements = {item["Id"]: item["count"] for item in properties.get("achievementProgressions", [])}
+        for achievement, field in ACHIEVEMENT_FIELDS.items():
+            setattr(player, field, player.achievements.get(achievement, 0))
+
+        player.kill_stats = {str(stat["Id"]).lower(): stat["count"] for stat in properties.get("killStats", [])}
+        player._best_weapons = dict(sorted(player.kill_stats.items(), key=lambda item: item[1], reverse=True)[:BEST_WEAPONS_COUNT])
+
+    return player
+
+def decode_mod_entry(entry: dict, moderators: dict[str, Optional[str]]) -> ModEntry:
+    """ Decodes a raw moderation note (`moderators`: PlayFabId -> name, see `resolve_player_names`) """
+    timestamp = int(entry.get("ts", 0))
+    message = str(entry.get("msg"))
+    if ':' in message:
+        title, content = (part.strip() or None for part in message.split(':', 1))
+    else:
+        title, content = None, message
+    return ModEntry(
+        moderator=moderators.get(str(entry.get("by") or '')),
+        title=title,
+        content=content,
+        created_at=(datetime.fromtimestamp(timestamp/1000) if timestamp else None)
+    )
 
-    mod_notes = list(json.loads(result.get("UserReadOnlyData", {}).get("mod_notes", {}).get("Value", "[]")))
-    if mod_notes:
-        moderators_cache: dict[str, str | None] = {}
+async def load_mod_history(
+        playfab_connection: PlayFabClient, player: PlayerProfile,
+        priority: RequestPriority = RequestPriority.INTERACTIVE
+    ) -> list[ModEntry]:
+    """ Decodes the moderation notes of `player` and resolves their authors (only the first time) """
+    if player.mod_history is None:
+        mod_notes = player.mod_notes
+        moderators = await resolve_player_names(playfab_connection, {str(entry.get("by") or '') for entry in mod_notes} - {''}, priority) if mod_notes else {}
+        history: list[ModEntry] = []
         for entry in mod_notes:
             try:
-                assert isinstance(entry, dict)
-                _timestamp = int(entry.get("ts", 0))
-                _moderator_id = str(entry.get("by") or '')
-                _message = str(entry.get("msg") or '')
-
-                if _moderator_id not in moderators_cache.keys():
-                    moderator_name = None
-                    if _moderator_id:
-                        get_mod_name = await playfab_connection.call_client_api(PlayFabAPI.SEARCH_PLAYER, {"PlayFabId": _moderator_id})
-                        if not get_mod_name:
-                            moderator_name = None
-                        mod_account_info = dict(get_mod_name.get("data", {})).get("AccountInfo")
-                        if mod_account_info:
-                            moderator_name = mod_account_info.get("Username")
-                            if not moderator_name:
-                                moderator_name = mod_account_info.get("TitleInfo", {}).get("DisplayName")
-                    moderators_cache[_moderator_id] = moderator_name
-                else:
-                    moderator_name = moderators_cache[_moderator_id]
-
-                _message = str(entry.get("msg"))
-                if ':' in _message:
-                    _message = _message.split(':', 1)
-                    title = _message[0].strip() or None
-                    content = _message[1].strip() or None
-                else:
-                    title, content = None, _message
-
-                player.mod_history.append(ModEntry(
-                    moderator=moderator_name,
-                    title=title,
-                    content=content,
-                    created_at=(datetime.fromtimestamp(_timestamp/1000) if _timestamp else None)
-                ))
+                history.append(decode_mod_entry(entry, moderators))
             except Exception:
                 pass
+        player.mod_history = history
+    return player.mod_history
+
+async def load_color_theme(player: PlayerProfile) -> Optional[tuple[bytes, str]]:
+    """ Renders the color theme of `player` from its loadout (only the first time), `None` if it has none """
+    if player.color_theme is None and player.primary_color and player.secondary_color:
+        image = await color_themes.get(player.primary_color, player.secondary_color)
+        if image:
+            player.color_theme = (image, f"{player.primary_color}|{player.secondary_color}.png")
+    return player.color_theme
+
+# ---------------------------------- player profiles cache
+PLAYER_CACHE_MAX_SIZE = 256 # profiles kept, the least recently used are dropped first
+PLAYER_CACHE_TTL_S = 60 # a profile younger than that is served as is...
+PLAYER_CACHE_STALE_TTL_S = 15 * 60 # ...older (up to this age), it is served while being refreshed in background
+PLAYER_NOT_FOUND_TTL_S = 30 # names that don't exist are not looked up again before that
+
+def normalize_player_name(name: str) -> str:
+    return name.strip().lower()
+
+class PlayerProfileCache():
+    """
+    LRU cache of the parsed player profiles, reachable by (normalized) name and by PlayFabId.
+    Concurrent lookups of the same name share the same PlayFab requests.
+    """
+    def __init__(self, max_size: int = PLAYER_CACHE_MAX_SIZE):
+        self._max_size = max_size
+        self._profiles: OrderedDict[str, tuple[PlayerProfile, float]] = OrderedDict() # PlayFabId -> (profile, monotonic fetch time)
+        self._ids_by_name: dict[str, str] = {}
+        self._not_found: dict[str, float] = {} # name -> monotonic expiration
+        self._loads = SingleFlight()
+
+    def previous(self, playfab_id: str) -> Optional[PlayerProfile]:
+        """ Returns the last profile fetched for this player, whatever its age (to reuse its unchanged sections) """
+        entry = self._profiles.get(playfab_id)
+        return entry[0] if entry else None
+
+    async def get(self, name: str, load: Callable[[], Awaitable[Optional[PlayerProfile]]]) -> Optional[PlayerProfile]:
+        key = normalize_player_name(name)
+        if self._not_found.get(key, 0) > time.monotonic():
+            return None
+        playfab_id = self._ids_by_name.get(key)
+        entry = self._profiles.get(playfab_id) if playfab_id else None
+        if entry is not None:
+            age = time.monotonic() - entry[1]
+            if age < PLAYER_CACHE_STALE_TTL_S:
+                self._profiles.move_to_end(playfab_id)
+                if age >= PLAYER_CACHE_TTL_S:
+                    self._loads.start(key, lambda: self._load(key, load))
+                return entry[0]
+        return await self._loads.run(key, lambda: self._load(key, load))
+
+    def store(self, profile: PlayerProfile, *names: str) -> None:
+        """ Caches `profile`, reachable by its PlayFabId, its own names and `names` """
+        self._profiles[profile.playfab_id] = (profile, time.monotonic())
+        self._profiles.move_to_end(profile.playfab_id)
+        for name in (*names, profile.display_name, profile.username):
+            if name and name.lower() != "none":
+                self._ids_by_name[normalize_player_name(name)] = profile.playfab_id
+                self._not_found.pop(normalize_player_name(name), None)
+
+        while len(self._profiles) > self._max_size:
+            evicted_id, _ = self._profiles.popitem(last=False)
+            self._ids_by_name = {name: playfab_id for name, playfab_id in self._ids_by_name.items() if playfab_id != evicted_id}
+
+    async def _load(self, key: str, load: Callable[[], Awaitable[Optional[PlayerProfile]]]) -> Optional[PlayerProfile]:
+        try:
+            profile = await load()
+        except AccountNotFound:
+            now = time.monotonic()
+            self._not_found = {name: expiration for name, expiration in self._not_found.items() if expiration > now}
+            self._not_found[key] = now + PLAYER_NOT_FOUND_TTL_S
+            self._ids_by_name.pop(key, None)
+            return None
+        if profile is not None:
+            self.store(profile, key)
+        return profile
 
-    properties = dict(json.loads(result.get("UserReadOnlyData", {}).get("Properties", {}).get("Value", {})))
-    if properties:
-        player.level = properties.get("Level", 0)
-        player.xp = properties.get("Experience", 0)
-        player.is_admin = bool(properties.get("isAdmin", False))
-        player._clan = properties.get("verificationProperties", None)
-
-        achievements = {item["Id"]: item["count"] for item in properties.get("achievementProgressions", [])}
-        if achievements:
-            player.kills = achievements.get("kills", 0)
-            player.deaths = achievements.get("deaths", 0)
-            player.matches = achievements.get("games", 0)
-            player.wins = achievements.get("wins", 0)
-            player.flags  = achievements.get("flags", 0)
-            player.skulls = achievements.get("skulls", 0)
-            player.winstreak = achievements.get("winstreak", 0)
-            player.vehicle_kills = achievements.get("vehKills", 0)
-            player.headshot = achievements.get("headshot", 0)
-            player.double_kill = achievements.get("kchain_x2", 0)
-            player.triple_kill = achievements.get("kchain_x3", 0)
-            player.quad_kill = achievements.get("kchain_x4", 0)
-            player.mega_kill = achievements.get("kchain_x5", 0)
-            player.ultra_kill = achievements.get("kchain_x6", 0)
-            player.monster_kill = achievements.get("kchain_x7", 0)
-            player.killing_spree = achievements.get("killStreak_x4", 0)
-            player.dominating = achievements.get("killStreak_x6", 0)
-            player.unstoppable = achievements.get("killStreak_x8", 0)
-            player.godlike = achievements.get("killStreak_x10", 0)
-            player.assist = achievements.get("assist", 0)
-
-        kill_stats = {str(stat["Id"]).lower(): stat["count"] for stat in properties.get("killStats", [])}
-        player._best_weapons = dict(sorted(kill_stats.items(), key=lambda item: item[1], reverse=True)[:5])
-
-    avatar = dict(json.loads(result.get("UserData", {}).get("Loadout", {}).get("Value", "{}")))
-    if avatar:
-        player._avatar_mods = [str(mod) for mod in avatar.get("avatarMods", [])]
-        if avatar.get("color_pri", None):
-            player.primary_color = f"#{avatar["color_pri"]}"
-        if avatar.get("color_sec", None):
-            player.secondary_color = f"#{avatar["color_sec"]}"
-
-        if player.primary_color and player.secondary_color:
-            buffer = BytesIO()
-            image = Image.new("RGB", (60, 60), color=player.secondary_color)
-            draw = ImageDraw.Draw(image)
-            draw.polygon(((0, 0), (0, 60), (60, 0)), fill=player.primary_color)
-            image.save(buffer, format='PNG')
-            buffer.seek(0)
-            player.color_theme = (buffer, f"{player.primary_color}|{player.secondary_color}.png")
-
-    return player
\ No newline at end of file
+player_cache = PlayerProfileCache()
+
+async def fetch_player(
+        playfab_connection: PlayFabClient, name: str,
+        priority: RequestPriority = RequestPriority.INTERACTIVE, hedged: bool = True
+    ) -> Optional[PlayerProfile]:
+    """
+    Returns the profile of a player (`None` if not found or unavailable), through `player_cache`.
+    Each profile actually fetched is recorded in the progress snapshots of the player storage.
+    See `find_account` for `hedged`.
+    """
+    async def load() -> Optional[PlayerProfile]:
+        player = await load_player(playfab_connection, name, priority, hedged)
+        if player and playfab_connection.player_storage:
+            await playfab_connection.player_storage.add_snapshot(player.playfab_id, player.name, player.counters())
+        return player
+    return await player_cache.get(name, load)
+
+# ---------------------------------- watchlist
+def profile_fingerprint(result: dict) -> str:
+    """
+    Digest of the parts of a raw profile followed by the watchlist (name, moderation notes, properties),
+    computed on the JSON-in-JSON blobs as they are, without decoding them
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    read_only_data = result.get("UserReadOnlyData", {})
+    for part in (result.get("DisplayName"), read_only_data.get("mod_notes", {}).get("Value"), read_only_data.get("Properties", {}).get("Value")):
+        digest.update(str(part or '').encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+async def watch_player(
+        playfab_connection: PlayFabClient, playfab_id: str, fingerprint: Optional[str],
+        priority: RequestPriority = RequestPriority.BACKGROUND
+    ) -> tuple[Optional[str], Optional[PlayerProfile]]:
+    """
+    Fetches the raw profile of a watched player and returns its fingerprint (`None` if the call failed) with the
+    parsed profile, which is `None` too if the fingerprint is still `fingerprint` (nothing to decode nor to compare)
+    """
+    result = await fetch_remote_profile(playfab_connection, playfab_id, priority)
+    if result is None:
+        return (None, None)
+    new_fingerprint = profile_fingerprint(result)
+    if new_fingerprint == fingerprint:
+        return (new_fingerprint, None)
+
+    player = PlayerProfile()
+    player.playfab_id = playfab_id
+    decode_profile(player, result, player_cache.previous(playfab_id))
+    if playfab_connection.player_storage:
+        await playfab_connection.player_storage.add_snapshot(player.playfab_id, player.name, player.counters())
+    return (new_fingerprint, player)
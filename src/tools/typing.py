@@ -7,10 +7,27 @@ Abstraction layer for manipulating game data
 
 from __future__ import annotations
 import aiohttp
+import asyncio
+import time
 from enum import Enum
+from typing import Iterable
 # bot files
 from data.constants import DefaultEmojis
-from tools.api_client import PublicAPI
+from tools.api_client import (
+    PublicAPI,
+    HTTPClient,
+    Deadline,
+    SingleFlight,
+    UpstreamUnavailable,
+    read_body
+)
+from tools.json_codec import loads as json_loads
+
+REGION_PING_TIMEOUT_S = 3 # shared by all the pings of a same check (they run concurrently)
+REGION_STATUS_TTL_S = 20 # a region pinged less than that ago isn't pinged again, whatever the view asking for it
+
+_region_statuses: dict[str, tuple[str, float]] = {} # region name -> (status, monotonic ping time)
+_region_pings = SingleFlight()
 
 # Chap. 8.13.8: https://docs.python.org/3.5/library/enum.html#allowed-members-and-attributes-of-enumerations
 # Example (8.13.13.4): https://docs.python.org/3.5/library/enum.html#planet
@@ -64,25 +81,52 @@ class GameRegion:
         """
         return self.players.get(playlist, 0)
 
-    @property
-    async def status(self) -> str:
+    async def status(self, http_client: HTTPClient, deadline: Deadline | None = None) -> str:
+        """
+        Returns the status of the server, pinged at most once every `REGION_STATUS_TTL_S` seconds
+        (a ping already in progress for another view is shared)
+        """
         if not self._status:
-            try:
-                PING_URL = PublicAPI.REGION_PING.format(region=self.name)
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(PING_URL, timeout=3) as resp_ping:
-                        if resp_ping.status == 200:
-                            data = await resp_ping.json(content_type=None)
-                            if isinstance(data, dict) and data.get("status") == "ok":
-                                self._status = f"{DefaultEmojis.ONLINE} Online"
-                            else:
-                                self._status = "🟡 Down"
-                        else:
-                            self._status = f"{DefaultEmojis.OFFLINE} Unavailable"
-            except Exception:
-                self._status = f"{DefaultEmojis.NO_ENTRY} Error"
+            cached = _region_statuses.get(self.name)
+            if cached and time.monotonic() - cached[1] < REGION_STATUS_TTL_S:
+                self._status = cached[0]
+            else:
+                self._status = await _region_pings.run(
+                    self.name, lambda: ping_region(http_client, self.name, deadline or Deadline(REGION_PING_TIMEOUT_S))
+                )
         return self._status
 
+async def ping_region(http_client: HTTPClient, name: str, deadline: Deadline) -> str:
+    async def read_status(resp_ping: aiohttp.ClientResponse) -> str:
+        if resp_ping.status == 200:
+            data = json_loads(await read_body(resp_ping))
+            if isinstance(data, dict) and data.get("status") == "ok":
+                return f"{DefaultEmojis.ONLINE} Online"
+            return "🟡 Down"
+        return f"{DefaultEmojis.OFFLINE} Unavailable"
+
+    try:
+        PING_URL = PublicAPI.REGION_PING.format(region=name)
+        status = await http_client.request("GET", PING_URL, read_status, deadline)
+    except UpstreamUnavailable as error:
+        # the region answered, but with a 5xx (raised once the retries are exhausted)
+        if isinstance(error.__cause__, aiohttp.ClientResponseError):
+            status = f"{DefaultEmojis.OFFLINE} Unavailable"
+        else:
+            status = f"{DefaultEmojis.NO_ENTRY} Error"
+    except Exception:
+        status = f"{DefaultEmojis.NO_ENTRY} Error"
+    _region_statuses[name] = (status, time.monotonic())
+    return status
+
+async def regions_status(http_client: HTTPClient, regions: Iterable[GameRegion], timeout: float = REGION_PING_TIMEOUT_S) -> list[str]:
+    """
+    Returns the status of each region, the pings being sent concurrently within the same deadline
+    (a dead region costs `timeout` once, not once per region)
+    """
+    deadline = Deadline(timeout)
+    return list(await asyncio.gather(*(region.status(http_client, deadline) for region in regions)))
+
 class GameInProgress:
     """
     Represents an ongoing game session (with its map, mode, players, etc.)
@@ -0,0 +1,154 @@
+from discord.ext import commands
+import asyncio
+import datetime
+import asqlite
+import json
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    TypeVar
+)
+# bot files
+from data.constants import DefaultEmojis
+from tools.api_client import (
+    Deadline,
+    SingleFlight,
+    RequestPriority,
+    DEFAULT_DEADLINE_S,
+    cache_hit
+)
+
+from tools.json_codec import loads as json_loads
+from tools.log_builder import (
+    LogColor,
+    BOTLOG,
+    log
+)
+
+LAST_KNOWN_GOOD_WAIT_S = 1.5 # with a stored copy to fall back on, a user doesn't wait longer than that for a slow upstream
+LAST_KNOWN_GOOD_PERSIST_INTERVAL_S = 60 # an unchanged payload is written to the database at most once per interval
+
+T = TypeVar("T")
+
+@dataclass
+class LastKnownGood:
+    value: Any
+    saved_at: datetime.datetime
+
+class UpstreamStorage():
+    """
+    Last successful payload of each game service (CCU, regions, server lists, game version, build dates),
+    kept in memory and in the database so that it survives restarts. While a service is unavailable,
+    its last known good payload is served instead and the service is marked as stale (see `stale_since`).
+    """
+    def __init__(self, bot: commands.Bot, pool: asqlite.Pool):
+        self._bot = bot
+        self._pool = pool
+        self._entries: dict[str, LastKnownGood] = {}
+        self._persisted_at: dict[str, float] = {} # monotonic
+        self._stale: set[str] = set()
+        self._fetches = SingleFlight()
+
+    async def init_tables(self) -> None:
+        try:
+            async with self._pool.acquire() as conn:
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS upstream_last_known_good (
+                        key TEXT PRIMARY KEY NOT NULL,
+                        payload TEXT NOT NULL,
+                        saved_at TEXT NOT NULL
+                    )
+                    """
+                )
+                await conn.commit()
+                cur = await conn.execute("SELECT key, payload, saved_at FROM upstream_last_known_good")
+                for key, payload, saved_at in await cur.fetchall():
+                    self._entries[key] = LastKnownGood(json_loads(payload), datetime.datetime.fromisoformat(saved_at))
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.CRITICAL} CRITICAL ERROR - An exception was raised during init of the upstream data tables", msg=f"```\n{e}\n```"
+            )
+
+    async def remember(self, key: str, value: Any, fetched_at: datetime.datetime | None = None) -> None:
+        """
+        Stores `value` (JSON serializable), fetched at `fetched_at` (now by default),
+        as the last known good payload of `key`, which is no longer stale
+        """
+        self._stale.discard(key)
+        previous = self._entries.get(key)
+        self._entries[key] = LastKnownGood(value, fetched_at or datetime.datetime.now(datetime.timezone.utc))
+        if previous and previous.value == value and time.monotonic() - self._persisted_at.get(key, 0) < LAST_KNOWN_GOOD_PERSIST_INTERVAL_S:
+            return
+        self._persisted_at[key] = time.monotonic()
+        try:
+            async with self._pool.acquire() as conn:
+                await conn.execute(
+                    "INSERT OR REPLACE INTO upstream_last_known_good(key, payload, saved_at) VALUES(?, ?, ?)",
+                    (key, json.dumps(value), self._entries[key].saved_at.isoformat())
+                )
+                await conn.commit()
+        except Exception as e:
+            await log(
+                bot=self._bot, type=BOTLOG, color=LogColor.RED,
+                title=f"{DefaultEmojis.ERROR} Error during the saving of upstream data", msg=(f"*Key: {key}*\n```\n{e}\n```")
+            )
+
+    def recall(self, key: str) -> LastKnownGood | None:
+        """ Returns the last known good payload of `key` (if any), which is now considered stale """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._stale.add(key)
+        return entry
+
+    def stale_since(self, *keys: str) -> datetime.datetime | None:
+        """ Returns the save date of the oldest stale payload among `keys`, `None` if none of them is stale """
+        dates = [self._entries[key].saved_at for key in keys if key in self._stale]
+        return min(dates) if dates else None
+
+    async def fetch(
+            self, key: str, fetch: Callable[[Deadline | None], Awaitable[T | None]], deadline: Deadline | None = None,
+            priority: RequestPriority = RequestPriority.INTERACTIVE
+        ) -> T | None:
+        """
+        Runs `fetch` (which is given the deadline to respect) and remembers its result. If it fails or returns `None`,
+        the last known good payload is returned instead, or the error is raised again if there is none.
+
+        With a stored copy to fall back on, an interactive caller doesn't wait more than `LAST_KNOWN_GOOD_WAIT_S` for the
+        upstream: the fetch keeps its whole deadline though, and updates the stored copy when it answers later.
+        Background callers (nobody is waiting for them) wait for the whole deadline.
+        """
+        deadline = deadline or Deadline(DEFAULT_DEADLINE_S)
+        # without a stored copy, there is nothing better to do than waiting for the fetch (bounded by its deadline)
+        wait = None
+        if key in self._entries and priority == RequestPriority.INTERACTIVE:
+            wait = min(deadline.remaining, LAST_KNOWN_GOOD_WAIT_S)
+        try:
+            async with asyncio.timeout(wait):
+                value = await self._fetches.run(key, lambda: self._fetch(key, fetch, deadline))
+        except Exception:
+            entry = self.recall(key)
+            if entry is None:
+                raise
+            return entry.value
+
+        if value is None:
+            entry = self.recall(key)
+            return entry.value if entry else None
+        return value
+
+    async def _fetch(self, key: str, fetch: Callable[[Deadline | None], Awaitable[T | None]], deadline: Deadline) -> T | None:
+        cache_hit.set(None)
+        value = await fetch(deadline)
+        if value is None:
+            return value
+        # a value served from the response cache keeps its fetch date, and stays stale while it can't be revalidated
+        hit = cache_hit.get()
+        await self.remember(key, value, hit.fetched_at if hit else None)
+        if hit and hit.stale:
+            self.recall(key)
+        return value